@@ -5,6 +5,7 @@ import streamlit as st
 from shared_helpers import render_match, get_winner_player, sanitize_key
 from shared_helpers import sanitize_key, render_match, get_winner_player
 from shared_helpers import sanitize_key, render_match
+from standings_helpers import compute_pod_standings_from_results
 
 
 
@@ -132,32 +133,6 @@ def render_pod_matches(pod_name, players, editable, session_results):
 
 
 def compute_standings_from_results(pods, match_results):
-    import pandas as pd
-    pod_scores = {}
-    for pod_name, players in pods.items():
-        records = []
-        for player in players:
-            name = player["name"]
-            points = 0
-            margin = 0
-            for key, result in match_results.items():
-                if key.startswith(f"{pod_name}|") and name in key:
-                    winner = result.get("winner")
-                    margin_val = result.get("margin", 0)
-                    if winner == name:
-                        points += 1
-                        margin += margin_val
-                    elif winner == "Tie":
-                        points += 0.5
-                    else:
-                        margin -= margin_val
-            records.append({
-                "name": name,
-                "handicap": player["handicap"],
-                "points": points,
-                "margin": margin
-            })
-        pod_scores[pod_name] = pd.DataFrame(records)
-    return pod_scores
+    return compute_pod_standings_from_results(pods, match_results)
 
 # --- Moved from app_helpers.py ---
@@ -0,0 +1,185 @@
+# bracket_state.py
+# The knockout bracket as two small arrays instead of JSON strings per round.
+# seeds holds the 16 qualifiers by seed; winners holds, for each of the 15
+# slots (8 R16, 4 QF, 2 SF, final), the seed index that won it or -1.
+# Every round view (pairs, names entering a round, champion) is derived from
+# those, and the whole state serializes to one short string.
+#
+# Positions are the R16 bracket order (left pairs flattened, then right);
+# slot s covers the positions in SUBTREE_MASK[s].
+
+import json
+
+import numpy as np
+
+from odds_helpers import FINAL_MATCH_ID, QF_MATCH_IDS, R16_MATCH_IDS, R16_SEED_PAIRS, SF_MATCH_IDS
+
+NUM_SLOTS = 15
+UNDECIDED = -1
+
+# Bracket match deciding each slot, in slot order
+SLOT_MATCH_IDS = R16_MATCH_IDS + QF_MATCH_IDS + SF_MATCH_IDS + [FINAL_MATCH_ID]
+SLOT_OF_MATCH = {match_id: slot for slot, match_id in enumerate(SLOT_MATCH_IDS)}
+SLOT_LEVELS = [0] * 8 + [1] * 4 + [2] * 2 + [3]
+LEVEL_OFFSETS = [0, 8, 12, 14]
+
+# Seed index at each R16 position, and back
+POSITION_SEEDS = np.array([seed for pair in R16_SEED_PAIRS for seed in pair], dtype=np.int8)
+SEED_POSITIONS = np.argsort(POSITION_SEEDS).astype(np.int8)
+
+# R16 positions feeding each slot: 2 for an R16 slot, 4 for QF, 8 for SF, all 16 for the final
+_SLOT_SPANS = [2] * 8 + [4] * 4 + [8] * 2 + [16]
+_SLOT_STARTS = [2 * i for i in range(8)] + [4 * i for i in range(4)] + [0, 8] + [0]
+SUBTREE_MASK = np.zeros((NUM_SLOTS, 16), dtype=bool)
+for _slot, (_start, _span) in enumerate(zip(_SLOT_STARTS, _SLOT_SPANS)):
+    SUBTREE_MASK[_slot, _start:_start + _span] = True
+
+# Slots on each side of the bracket, per level
+SIDE_SLOTS = {
+    "left": {0: [0, 1, 2, 3], 1: [8, 9], 2: [12]},
+    "right": {0: [4, 5, 6, 7], 1: [10, 11], 2: [13]},
+}
+ROUND_LEVELS = {"r16": 0, "qf": 1, "sf": 2}
+
+
+def feeder_slots(slot):
+    """The two slots whose winners meet in this slot (None for R16 slots)."""
+    level = SLOT_LEVELS[slot]
+    if level == 0:
+        return None
+    first = LEVEL_OFFSETS[level - 1] + 2 * (slot - LEVEL_OFFSETS[level])
+    return first, first + 1
+
+
+def r16_positions(r16_left, r16_right):
+    """16 player names in bracket order from the two sides' R16 pairs."""
+    return [name for pair in list(r16_left) + list(r16_right) for name in pair]
+
+
+def _decode(raw):
+    if isinstance(raw, str):
+        try:
+            return json.loads(raw)
+        except ValueError:
+            return raw
+    return raw
+
+
+class BracketState:
+    """Seeds and slot winners of the knockout bracket."""
+
+    def __init__(self, seeds, winners=None):
+        self.seeds = list(seeds)
+        if len(self.seeds) != 16:
+            raise ValueError("A bracket needs 16 seeds")
+        self.winners = np.full(NUM_SLOTS, UNDECIDED, dtype=np.int8)
+        if winners is not None:
+            self.winners[:] = winners
+        self._seed_of = {name: i for i, name in enumerate(self.seeds)}
+
+    # --- construction ---
+    @classmethod
+    def from_record(cls, record, bracket_winners=None):
+        """
+        From a bracket_progression row: the compact "state" column when present,
+        otherwise the older r16_left/r16_right JSON pairs. Decided bracket
+        matches ({match_id: winner}) are applied on top. None if no field is set.
+        """
+        if not record:
+            return None
+        if record.get("state"):
+            state = cls.from_compact(record["state"])
+        else:
+            left, right = _decode(record.get("r16_left")), _decode(record.get("r16_right"))
+            if not left or not right or len(left) < 4 or len(right) < 4:
+                return None
+            seeds = [None] * 16
+            for name, seed in zip(r16_positions(left, right), POSITION_SEEDS):
+                seeds[seed] = name
+            state = cls(seeds)
+        for match_id, winner in (bracket_winners or {}).items():
+            if match_id in SLOT_OF_MATCH and winner:
+                state.advance(match_id, winner)
+        return state
+
+    def to_compact(self):
+        """'{"s":[16 seeds],"w":"<15 hex digits or ->"}'"""
+        winners = "".join("-" if w == UNDECIDED else format(int(w), "x") for w in self.winners)
+        return json.dumps({"s": self.seeds, "w": winners}, separators=(",", ":"))
+
+    @classmethod
+    def from_compact(cls, text):
+        data = json.loads(text)
+        return cls(data["s"], [UNDECIDED if c == "-" else int(c, 16) for c in data["w"]])
+
+    # --- updates ---
+    def advance(self, match_id, name):
+        """Record the winner of a bracket match; ignored if that player can't be in it."""
+        slot = SLOT_OF_MATCH[match_id]
+        seed = self._seed_of.get(name)
+        if seed is None or not SUBTREE_MASK[slot, SEED_POSITIONS[seed]]:
+            return False
+        self.winners[slot] = seed
+        return True
+
+    # --- views ---
+    def positions(self):
+        """Player names in R16 bracket order."""
+        return [self.seeds[seed] for seed in POSITION_SEEDS]
+
+    def slot_winner(self, slot):
+        seed = self.winners[slot]
+        return None if seed == UNDECIDED else self.seeds[seed]
+
+    def winner(self, match_id):
+        return self.slot_winner(SLOT_OF_MATCH[match_id])
+
+    def slot_names(self):
+        """Winner name per slot (None if undecided), in slot order."""
+        return [self.slot_winner(slot) for slot in range(NUM_SLOTS)]
+
+    def slot_pair(self, slot):
+        """The two players meeting in a slot, or None until both are known."""
+        feeders = feeder_slots(slot)
+        if feeders is None:
+            return tuple(self.seeds[seed] for seed in POSITION_SEEDS[2 * slot:2 * slot + 2])
+        first, second = (self.slot_winner(f) for f in feeders)
+        return (first, second) if first and second else None
+
+    def round_pairs(self, round_key, side):
+        """(match_id, (p1, p2)) for a round and side whose players are both known."""
+        slots = SIDE_SLOTS[side][ROUND_LEVELS[round_key]]
+        return [(SLOT_MATCH_IDS[slot], pair) for slot in slots if (pair := self.slot_pair(slot))]
+
+    def round_names(self, round_key):
+        """Players entering a round, e.g. 'r16_left' (8), 'qf_right' (up to 4)."""
+        round_name, side = round_key.split("_")
+        level = ROUND_LEVELS[round_name]
+        if level == 0:
+            return [name for slot in SIDE_SLOTS[side][0] for name in self.slot_pair(slot)]
+        return [name for slot in SIDE_SLOTS[side][level - 1] if (name := self.slot_winner(slot))]
+
+    def finalists(self):
+        return self.slot_winner(12), self.slot_winner(13)
+
+    def champion(self):
+        return self.slot_winner(14)
+
+    def results_record(self):
+        """
+        final_results row: the compact state plus the per-round winner columns
+        older readers expect.
+        """
+        names = self.slot_names()
+        return {
+            "state": self.to_compact(),
+            "r16_left": json.dumps(names[0:4]),
+            "r16_right": json.dumps(names[4:8]),
+            "qf_left": json.dumps(names[8:10]),
+            "qf_right": json.dumps(names[10:12]),
+            "sf_left": json.dumps(names[12:13]),
+            "sf_right": json.dumps(names[13:14]),
+            "finalist_left": names[12],
+            "finalist_right": names[13],
+            "champion": names[14],
+        }
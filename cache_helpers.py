@@ -0,0 +1,137 @@
+# cache_helpers.py
+# Content-addressed cache for simulation outputs.
+# Streamlit reruns the whole script on every widget change, so the same
+# simulation gets requested over and over; this serves repeats from memory
+# first, then from a local SQLite file that survives restarts.
+
+import hashlib
+import json
+import os
+import pickle
+import sqlite3
+import threading
+import time
+from collections import OrderedDict
+
+import numpy as np
+
+DEFAULT_CACHE_PATH = os.environ.get("SIM_CACHE_PATH", ".sim_cache.sqlite")
+
+
+def _normalize(value):
+    """Make inputs JSON-stable: arrays to lists, floats rounded, dict keys sorted by json.dumps."""
+    if isinstance(value, dict):
+        return {str(k): _normalize(v) for k, v in value.items()}
+    if isinstance(value, (list, tuple, np.ndarray)):
+        return [_normalize(v) for v in value]
+    if isinstance(value, (np.integer, np.bool_)):
+        return value.item()
+    if isinstance(value, (float, np.floating)):
+        return round(float(value), 6)
+    return value
+
+
+def cache_key(namespace, inputs, simulations=None, seed=None):
+    payload = json.dumps(
+        {"ns": namespace, "inputs": _normalize(inputs), "simulations": simulations, "seed": seed},
+        sort_keys=True, separators=(",", ":")
+    )
+    return hashlib.sha256(payload.encode()).hexdigest()
+
+
+class SimulationCache:
+    """
+    Two-tier cache: an in-memory LRU in front of a SQLite table.
+    Each tier is trimmed back to its byte budget (pickled size) by evicting
+    the least recently used entries; values bigger than the memory budget
+    are only kept on disk.
+    """
+
+    def __init__(self, path=DEFAULT_CACHE_PATH, memory_entries=256, max_memory_bytes=32 * 1024 * 1024,
+                 max_disk_bytes=64 * 1024 * 1024):
+        self.memory_entries = memory_entries
+        self.max_memory_bytes = max_memory_bytes
+        self.max_disk_bytes = max_disk_bytes
+        self._memory = OrderedDict()  # key -> (value, pickled size)
+        self._memory_bytes = 0
+        self._lock = threading.Lock()
+        self._db = sqlite3.connect(path, check_same_thread=False)
+        self._db.execute(
+            "CREATE TABLE IF NOT EXISTS sim_cache ("
+            " key TEXT PRIMARY KEY, value BLOB NOT NULL, size INTEGER NOT NULL, last_access REAL NOT NULL)"
+        )
+        self._db.commit()
+
+    def get(self, key):
+        with self._lock:
+            if key in self._memory:
+                self._memory.move_to_end(key)
+                return self._memory[key][0]
+            row = self._db.execute("SELECT value FROM sim_cache WHERE key = ?", (key,)).fetchone()
+            if row is None:
+                return None
+            self._db.execute("UPDATE sim_cache SET last_access = ? WHERE key = ?", (time.time(), key))
+            self._db.commit()
+            value = pickle.loads(row[0])
+            self._remember(key, value, len(row[0]))
+            return value
+
+    def set(self, key, value):
+        blob = pickle.dumps(value, protocol=pickle.HIGHEST_PROTOCOL)
+        with self._lock:
+            self._remember(key, value, len(blob))
+            self._db.execute(
+                "INSERT OR REPLACE INTO sim_cache (key, value, size, last_access) VALUES (?, ?, ?, ?)",
+                (key, blob, len(blob), time.time())
+            )
+            self._evict_disk()
+            self._db.commit()
+
+    def get_or_compute(self, namespace, inputs, compute, simulations=None, seed=None):
+        """Return the cached result for these inputs, or run compute() and store it."""
+        key = cache_key(namespace, inputs, simulations, seed)
+        value = self.get(key)
+        if value is None:
+            value = compute()
+            self.set(key, value)
+        return value
+
+    def clear(self):
+        with self._lock:
+            self._memory.clear()
+            self._memory_bytes = 0
+            self._db.execute("DELETE FROM sim_cache")
+            self._db.commit()
+
+    def _remember(self, key, value, size):
+        if key in self._memory:
+            self._memory_bytes -= self._memory.pop(key)[1]
+        if size > self.max_memory_bytes:
+            return
+        self._memory[key] = (value, size)
+        self._memory_bytes += size
+        while len(self._memory) > self.memory_entries or self._memory_bytes > self.max_memory_bytes:
+            self._memory_bytes -= self._memory.popitem(last=False)[1][1]
+
+    def _evict_disk(self):
+        total = self._db.execute("SELECT COALESCE(SUM(size), 0) FROM sim_cache").fetchone()[0]
+        if total <= self.max_disk_bytes:
+            return
+        for key, size in self._db.execute("SELECT key, size FROM sim_cache ORDER BY last_access").fetchall():
+            self._db.execute("DELETE FROM sim_cache WHERE key = ?", (key,))
+            total -= size
+            if total <= self.max_disk_bytes:
+                break
+
+
+_shared_cache = None
+_shared_lock = threading.Lock()
+
+
+def get_simulation_cache():
+    """Process-wide cache instance shared by every page and session."""
+    global _shared_cache
+    with _shared_lock:
+        if _shared_cache is None:
+            _shared_cache = SimulationCache()
+    return _shared_cache
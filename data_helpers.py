@@ -0,0 +1,734 @@
+# data_helpers.py
+# Read-side data layer for match_play_app.py.
+# Every tab used to query Supabase on its own (one query per bracket match,
+# another per advancing pair, the full match log twice...). A snapshot fetches
+# each table at most once per script run and serves indexed views from memory.
+# Behind the snapshots sits a process-wide TableCache, so sessions share one
+# fetch per table per TTL window instead of each paying the full load.
+
+import io
+import random
+import threading
+import time
+from datetime import datetime, timedelta, timezone
+
+import pandas as pd
+
+
+def _fetch_players(supabase):
+    return supabase.table("players").select("*").execute().data or []
+
+
+def _fetch_tournament_matches(supabase):
+    return supabase.table("tournament_matches").select("*") \
+        .order("created_at", desc=True).execute().data or []
+
+
+# Only the columns the app reads from a match row
+GROUP_MATCH_COLUMNS = "pod, player1, player2, winner, margin, created_at"
+BRACKET_MATCH_COLUMNS = "match_id, winner, margin"
+
+
+def latest_per_match(rows):
+    """Keep the first (newest) row for each (pod, player1, player2); rows must be newest first."""
+    latest = {}
+    for row in rows:
+        latest.setdefault((row["pod"], row["player1"], row["player2"]), row)
+    return list(latest.values())
+
+
+def missing_relation(error, relation):
+    """
+    True if a query failed because a table/view from a migration in sql/ isn't
+    there yet: Postgres 42P01 or PostgREST PGRST205.
+    """
+    if getattr(error, "code", None) in ("42P01", "PGRST205"):
+        return True
+    message = str(error)
+    return relation in message and ("does not exist" in message or "Could not find the table" in message)
+
+
+def _fetch_latest_match_results(supabase):
+    # The latest_match_results view (sql/latest_match_results.sql) does the
+    # grouping server-side, so the payload stays one row per pairing however
+    # many times a result gets edited.
+    try:
+        return supabase.table("latest_match_results").select(GROUP_MATCH_COLUMNS) \
+            .order("created_at", desc=True).execute().data or []
+    except Exception as e:
+        # Timeouts and auth errors go to with_backoff/the breaker, not a second query
+        if not missing_relation(e, "latest_match_results"):
+            raise
+        # View not deployed: fall back to the group-stage history, deduped locally
+        rows = supabase.table("tournament_matches").select(GROUP_MATCH_COLUMNS) \
+            .not_.is_("pod", "null").order("created_at", desc=True).execute().data or []
+        return latest_per_match(rows)
+
+
+BRACKET_MATCH_RANGE = (100, 410)
+
+
+def _fetch_bracket_matches(supabase):
+    # Bracket rows are upserted on match_id, so there is already one row per match
+    first, last = BRACKET_MATCH_RANGE
+    return supabase.table("tournament_matches").select(BRACKET_MATCH_COLUMNS) \
+        .gte("match_id", first).lte("match_id", last).execute().data or []
+
+
+def _fetch_bracket_progression(supabase):
+    return supabase.table("bracket_progression").select("*") \
+        .order("created_at", desc=True).limit(1).execute().data or []
+
+
+def _fetch_bracket_data(supabase):
+    return supabase.table("bracket_data").select("json_data") \
+        .order("timestamp", desc=True).limit(1).execute().data or []
+
+
+def _fetch_predictions(supabase):
+    return supabase.table("predictions").select("*") \
+        .order("timestamp", desc=True).execute().data or []
+
+
+def _fetch_final_results(supabase):
+    return supabase.table("final_results").select("*") \
+        .order("created_at", desc=True).limit(1).execute().data or []
+
+
+TABLE_FETCHERS = {
+    "players": _fetch_players,
+    "tournament_matches": _fetch_tournament_matches,
+    "latest_match_results": _fetch_latest_match_results,
+    "bracket_matches": _fetch_bracket_matches,
+    "bracket_progression": _fetch_bracket_progression,
+    "bracket_data": _fetch_bracket_data,
+    "predictions": _fetch_predictions,
+    "final_results": _fetch_final_results,
+}
+
+
+# How snapshot tables are served from the offline mirror (offline_helpers.LocalStore):
+# source table in the mirror plus a row filter. The mirror keeps one row per pairing/match.
+LOCAL_VIEWS = {
+    "tournament_matches": ("tournament_matches", lambda row: True),
+    "latest_match_results": ("tournament_matches", lambda row: bool(row.get("pod"))),
+    "bracket_matches": ("tournament_matches",
+                        lambda row: row.get("match_id") is not None
+                        and BRACKET_MATCH_RANGE[0] <= row["match_id"] <= BRACKET_MATCH_RANGE[1]),
+    "bracket_progression": ("bracket_progression", lambda row: True),
+    "bracket_data": ("bracket_data", lambda row: True),
+    "predictions": ("predictions", lambda row: True),
+    "final_results": ("final_results", lambda row: True),
+}
+
+
+# --- Retries and circuit breaking ---
+def with_backoff(fetch, attempts=3, base_delay=0.25, max_delay=2.0):
+    """Call fetch(), retrying failures with full-jitter exponential backoff."""
+    for attempt in range(attempts):
+        try:
+            return fetch()
+        except Exception:
+            if attempt == attempts - 1:
+                raise
+            time.sleep(random.uniform(0, min(max_delay, base_delay * 2 ** attempt)))
+
+
+class CircuitBreaker:
+    """
+    Serves the last good result while a source keeps failing.
+    After failure_threshold consecutive failures the circuit opens and calls
+    skip the network until reset_after seconds pass; then one call is let through.
+    With no good result yet, failures are raised as usual.
+    """
+
+    def __init__(self, failure_threshold=3, reset_after=30):
+        self.failure_threshold = failure_threshold
+        self.reset_after = reset_after
+        self.failures = 0
+        self.opened_at = None
+        self.last_good = None
+        self.stale = False
+        self._lock = threading.Lock()
+
+    def is_open(self):
+        return self.opened_at is not None and time.monotonic() - self.opened_at < self.reset_after
+
+    def record_success(self, result):
+        with self._lock:
+            self.failures, self.opened_at = 0, None
+            self.last_good, self.stale = result, False
+
+    def call(self, fetch):
+        if self.is_open() and self.last_good is not None:
+            self.stale = True
+            return self.last_good
+        try:
+            result = fetch()
+        except Exception:
+            with self._lock:
+                self.failures += 1
+                if self.failures >= self.failure_threshold:
+                    self.opened_at = time.monotonic()
+            if self.last_good is None:
+                raise
+            self.stale = True
+            return self.last_good
+        self.record_success(result)
+        return result
+
+
+# Per-process breakers for tables the page can't render without
+TABLE_BREAKERS = {
+    "bracket_matches": CircuitBreaker(),
+}
+
+
+# Seconds a shared copy of each table stays fresh. Writes from this app
+# invalidate immediately; the TTL only bounds staleness from other writers.
+# touch() and apply_rows() (change feed, write-through) restart the TTL, but
+# never past TABLE_MAX_AGE after the full fetch, so a missed change still
+# gets picked up by a refetch.
+TABLE_MAX_AGE = 300
+TABLE_TTLS = {
+    "players": 3600,
+    "tournament_matches": 15,
+    "latest_match_results": 15,
+    "bracket_matches": 15,
+    "bracket_progression": 60,
+    "bracket_data": 300,
+    "predictions": 60,
+    "final_results": 60,
+}
+
+
+class TableCache:
+    """
+    Shared table cache with a per-table TTL and explicit invalidation.
+    Concurrent misses on the same table wait for a single fetch.
+    """
+
+    def __init__(self, ttls=TABLE_TTLS, max_age=TABLE_MAX_AGE):
+        self.ttls = dict(ttls)
+        self.max_age = max_age
+        self._entries = {}  # table -> (fetched_at, checked_at, rows)
+        self._versions = {}
+        self._lock = threading.Lock()
+        self._fetch_locks = {table: threading.Lock() for table in TABLE_FETCHERS}
+
+    def _fresh(self, table):
+        entry = self._entries.get(table)
+        if entry is None:
+            return None
+        fetched_at, checked_at, rows = entry
+        now, ttl = time.monotonic(), self.ttls.get(table, 0)
+        if now - checked_at < ttl and now - fetched_at < max(ttl, self.max_age):
+            return rows
+        return None
+
+    def peek(self, table):
+        """Cached rows if still fresh, else None; never fetches."""
+        return self._fresh(table)
+
+    def get(self, table, fetch):
+        rows = self._fresh(table)
+        if rows is not None:
+            return rows
+        with self._fetch_locks.setdefault(table, threading.Lock()):
+            rows = self._fresh(table)
+            if rows is not None:
+                return rows
+            version = self._versions.get(table, 0)
+            rows = fetch()
+            with self._lock:
+                # Don't store a fetch that raced with an invalidation
+                if self._versions.get(table, 0) == version:
+                    now = time.monotonic()
+                    self._entries[table] = (now, now, rows)
+            return rows
+
+    def get_many(self, tables, fetch_many):
+        """
+        get() for a batch loaded together: fetch_many(tables) -> {table: rows or
+        Exception}. Same single-flight locks and invalidation guard; tables
+        another thread is already fetching are left out (rows() waits for
+        them), as are failed fetches and ones that raced an invalidation.
+        """
+        found, locked = {}, []
+        try:
+            for table in tables:
+                rows = self._fresh(table)
+                if rows is None and self._fetch_locks.setdefault(table, threading.Lock()).acquire(blocking=False):
+                    locked.append(table)
+                    rows = self._fresh(table)
+                if rows is not None:
+                    found[table] = rows
+            missing = [table for table in locked if table not in found]
+            if not missing:
+                return found
+            with self._lock:
+                versions = {table: self._versions.get(table, 0) for table in missing}
+            fetched = fetch_many(missing)
+            with self._lock:
+                now = time.monotonic()
+                for table, rows in fetched.items():
+                    if isinstance(rows, Exception) or self._versions.get(table, 0) != versions[table]:
+                        continue
+                    self._entries[table] = (now, now, rows)
+                    found[table] = rows
+            return found
+        finally:
+            for table in locked:
+                self._fetch_locks[table].release()
+
+    def invalidate(self, *tables):
+        with self._lock:
+            for table in tables or list(self._entries):
+                self._entries.pop(table, None)
+                self._versions[table] = self._versions.get(table, 0) + 1
+
+    def touch(self, *tables):
+        """Restart the TTL of cached tables known to be current (bounded by max_age)."""
+        with self._lock:
+            for table in tables:
+                if table in self._entries:
+                    fetched_at, _, rows = self._entries[table]
+                    self._entries[table] = (fetched_at, time.monotonic(), rows)
+
+    def apply_rows(self, table, rows, key):
+        """
+        Merge new rows into a cached table (newest first), replacing rows with
+        the same key(row), and restart its TTL. Uncached tables are left alone.
+        A fetch already in flight is not stored, since it may predate these rows.
+        """
+        with self._lock:
+            self._versions[table] = self._versions.get(table, 0) + 1
+            entry = self._entries.get(table)
+            if entry is None:
+                return
+            fetched_at, _, cached = entry
+            new_keys = {key(row) for row in rows}
+            merged = list(reversed(rows)) + [row for row in cached if key(row) not in new_keys]
+            self._entries[table] = (fetched_at, time.monotonic(), merged)
+
+
+_shared_table_cache = None
+_shared_lock = threading.Lock()
+
+
+def get_table_cache():
+    """Process-wide table cache shared by every session."""
+    global _shared_table_cache
+    with _shared_lock:
+        if _shared_table_cache is None:
+            _shared_table_cache = TableCache()
+    return _shared_table_cache
+
+
+# --- Change feed ---
+# Where each changed row lands in the shared cache, and the key it replaces by
+FEED_ROUTES = {
+    "tournament_matches": [
+        ("tournament_matches", lambda row: row.get("id")),
+        ("latest_match_results",
+         lambda row: (row["pod"], row["player1"], row["player2"]) if row.get("pod") else None),
+        ("bracket_matches", lambda row: row.get("match_id")),
+    ],
+    "bracket_progression": [
+        ("bracket_progression", lambda row: row.get("id")),
+    ],
+}
+
+# Server-assigned change stamp (sql/feed_synced_at.sql): a trigger sets it to
+# the database clock on every insert and update, so client clocks, offline
+# replays and upserts that keep created_at all still move it forward.
+FEED_STAMP = "synced_at"
+# Stamps come from transaction clocks, so a row can commit a little after a
+# newer-stamped one; each poll re-reads this far behind the high-water mark.
+FEED_OVERLAP = timedelta(seconds=2)
+FEED_EPOCH = datetime(1970, 1, 1, tzinfo=timezone.utc).isoformat()
+
+
+def stamp_time(stamp):
+    """ISO timestamp text as an aware datetime (naive stamps are UTC)."""
+    when = datetime.fromisoformat(stamp)
+    return when if when.tzinfo else when.replace(tzinfo=timezone.utc)
+
+
+class ChangeFeed:
+    """
+    Polling change feed: one background thread per process asks for rows
+    stamped after a high-water mark and merges only those rows into the shared
+    TableCache, so database load follows the number of results, not viewers.
+    Sessions compare version against what they last rendered to know when to rerun.
+    """
+
+    def __init__(self, supabase, cache, interval=5, tables=tuple(FEED_ROUTES)):
+        self.supabase = supabase
+        self.cache = cache
+        self.interval = interval
+        self.tables = tables
+        self.version = 0
+        self.last_error = None
+        # Set from the server's own newest stamp on the first poll
+        self._high_water = {table: None for table in tables}
+        self._seen = {table: {} for table in tables}  # row id -> stamp, inside the overlap window
+        self._thread = None
+        self._stop = threading.Event()
+
+    def start(self):
+        if self._thread is None or not self._thread.is_alive():
+            self._stop.clear()
+            self._thread = threading.Thread(target=self._run, name="change-feed", daemon=True)
+            self._thread.start()
+        return self
+
+    def stop(self):
+        self._stop.set()
+
+    def _run(self):
+        while not self._stop.wait(self.interval):
+            try:
+                self.poll()
+                self.last_error = None
+            except Exception as e:
+                self.last_error = str(e)
+
+    def _seed(self, table):
+        rows = self.supabase.table(table).select(FEED_STAMP) \
+            .order(FEED_STAMP, desc=True).limit(1).execute().data or []
+        # Empty table: everything written from here on is a change
+        self._high_water[table] = rows[0][FEED_STAMP] if rows else FEED_EPOCH
+        # Rows inside the overlap window are already in what's fetched next
+        self._seen[table] = {row.get("id"): row.get(FEED_STAMP) for row in self._fetch_changes(table)}
+        # Cached copies may predate the mark; refetch them once rather than trust them
+        self.cache.invalidate(*(target for target, _ in FEED_ROUTES[table]))
+
+    def _fetch_changes(self, table):
+        since = stamp_time(self._high_water[table]) - FEED_OVERLAP
+        return self.supabase.table(table).select("*").gt(FEED_STAMP, since.isoformat()) \
+            .order(FEED_STAMP).execute().data or []
+
+    def poll(self):
+        """Fetch and apply rows changed since the last poll; returns how many arrived."""
+        changed = 0
+        for table in self.tables:
+            if self._high_water[table] is None:
+                self._seed(table)
+                continue
+            rows = self._fetch_changes(table)
+            seen = self._seen[table]
+            rows = [row for row in rows if seen.get(row.get("id")) != row.get(FEED_STAMP)]
+            if rows:
+                for target, key in FEED_ROUTES[table]:
+                    routed = [row for row in rows if key(row) is not None]
+                    if routed:
+                        self.cache.apply_rows(target, routed, key)
+                for row in rows:
+                    seen[row.get("id")] = row.get(FEED_STAMP)
+                self._high_water[table] = max([self._high_water[table]] + [row[FEED_STAMP] for row in rows],
+                                              key=stamp_time)
+                changed += len(rows)
+            # The feed has every change through the mark, so the cached copies
+            # are current; the TableCache max age still forces a periodic refetch
+            self.cache.touch(*(target for target, _ in FEED_ROUTES[table]))
+            floor = stamp_time(self._high_water[table]) - FEED_OVERLAP
+            for row_id, stamp in list(seen.items()):
+                if stamp_time(stamp) < floor:
+                    del seen[row_id]
+        if changed:
+            self.version += 1
+        return changed
+
+
+def match_key(pod, player1, player2):
+    return f"{pod}|{player1} vs {player2}"
+
+
+def normalize_name(name):
+    """Comparison form of a person's name; matches predictions.name_key in sql/predictions_name_key.sql."""
+    return name.strip().lower().replace('\xa0', ' ').replace("’", "'") if name else ""
+
+
+def missing_column(error, column):
+    """
+    True if a query failed because a column from a migration in sql/ isn't
+    there yet: Postgres 42703 (filters) or PostgREST PGRST204 (inserts).
+    """
+    if getattr(error, "code", None) in ("42703", "PGRST204"):
+        return True
+    message = str(error)
+    return f"'{column}'" in message or (column in message and "does not exist" in message)
+
+
+class PredictionNameIndex:
+    """
+    Who has already submitted a prediction, by normalized name.
+    Seeded with one name-only query, then kept current by add() on submit;
+    a name not in the set costs one indexed lookup (other servers may have
+    taken it). A hit is remembered; a miss is trusted for miss_ttl seconds
+    or until invalidate(), so rerunning the form doesn't query again.
+    """
+
+    def __init__(self, supabase, miss_ttl=60):
+        self.supabase = supabase
+        self.miss_ttl = miss_ttl
+        self._names = set()
+        self._misses = {}  # key -> time.monotonic() of the lookup
+        self._lock = threading.Lock()
+        self._seeded = False
+
+    def _seed(self):
+        rows = self.supabase.table("predictions").select("name").execute().data or []
+        with self._lock:
+            self._names.update(normalize_name(row["name"]) for row in rows)
+            self._seeded = True
+
+    def _lookup(self, key):
+        try:
+            query = self.supabase.table("predictions").select("id").eq("name_key", key)
+            return bool(query.limit(1).execute().data)
+        except Exception as e:
+            if not missing_column(e, "name_key"):
+                raise
+        # name_key not deployed yet: re-read the names and normalize them here,
+        # the same way the generated column would
+        self._seed()
+        return key in self._names
+
+    def contains(self, name):
+        key = normalize_name(name)
+        if not self._seeded:
+            self._seed()
+        if key in self._names:
+            return True
+        checked = self._misses.get(key)
+        if checked is not None and time.monotonic() - checked < self.miss_ttl:
+            return False
+        if self._lookup(key):
+            self.add(name)
+            return True
+        with self._lock:
+            self._misses[key] = time.monotonic()
+        return False
+
+    def add(self, name):
+        key = normalize_name(name)
+        with self._lock:
+            self._names.add(key)
+            self._misses.pop(key, None)
+
+    def invalidate(self):
+        """Forget cached misses and reseed on the next check."""
+        with self._lock:
+            self._misses.clear()
+            self._seeded = False
+
+
+class TournamentSnapshot:
+    """
+    Lazily loaded, per-run view of the tournament tables.
+    A table is fetched on first access and reused for the rest of the run;
+    fetch errors propagate so callers keep their own st.error/st.warning handling.
+    Writers call record_* so the rest of the run sees their change without a refetch;
+    match rows are patched into the shared cache, other tables are dropped from it.
+    """
+
+    def __init__(self, supabase, cache=None, reader=None, store=None):
+        self.supabase = supabase
+        self.cache = cache
+        self.reader = reader
+        self.store = store
+        self._tables = {}
+        self._errors = {}
+        self._group_index = None
+        self._bracket_index = None
+
+    def rows(self, table):
+        if table in self._errors:
+            # Already failed this run; don't retry once per widget
+            raise self._errors[table]
+        if table not in self._tables and self.store is not None and table in LOCAL_VIEWS:
+            # Offline-first: the local mirror answers, the sync worker keeps it current
+            source, keep = LOCAL_VIEWS[table]
+            self._tables[table] = [row for row in self.store.read(source) if keep(row)]
+        if table not in self._tables:
+            fetch = lambda: TABLE_FETCHERS[table](self.supabase)
+            if table in TABLE_BREAKERS:
+                raw_fetch = fetch
+                fetch = lambda: TABLE_BREAKERS[table].call(lambda: with_backoff(raw_fetch))
+            try:
+                rows = self.cache.get(table, fetch) if self.cache else fetch()
+            except Exception as e:
+                self._errors[table] = e
+                raise
+            # Copy, so write-through never mutates the shared cached list
+            self._tables[table] = list(rows)
+        return self._tables[table]
+
+    def prefetch(self, *tables):
+        """
+        Load several tables in one concurrent batch through the pooled reader.
+        Tables that fail here are left for rows() to fetch (and report) normally.
+        """
+        if self.reader is None:
+            return
+        wanted = [table for table in tables
+                  if table not in self._tables and not (self.store is not None and table in LOCAL_VIEWS)]
+
+        def fetch_many(names):
+            fetched = self.reader.fetch_tables(names)
+            for table, rows in fetched.items():
+                if table in TABLE_BREAKERS and not isinstance(rows, Exception):
+                    TABLE_BREAKERS[table].record_success(rows)
+            return fetched
+
+        try:
+            if self.cache:
+                loaded = self.cache.get_many(wanted, fetch_many)
+            else:
+                loaded = {table: rows for table, rows in fetch_many(wanted).items()
+                          if not isinstance(rows, Exception)}
+        except Exception:
+            return
+        for table, rows in loaded.items():
+            self._tables[table] = list(rows)
+
+    def latest(self, table):
+        rows = self.rows(table)
+        return rows[0] if rows else None
+
+    # --- tournament_matches indexes ---
+    # Rows are newest first, so the first row seen for a key is the latest
+    def _groups(self):
+        if self._group_index is None:
+            index = {}
+            for row in self.rows("latest_match_results"):
+                index.setdefault(match_key(row["pod"], row["player1"], row["player2"]), row)
+            self._group_index = index
+        return self._group_index
+
+    def _brackets(self):
+        if self._bracket_index is None:
+            index = {}
+            for row in self.rows("bracket_matches"):
+                index.setdefault(row["match_id"], row)
+            self._bracket_index = index
+        return self._bracket_index
+
+    def group_results(self):
+        """Latest result per group match: {"pod|p1 vs p2": {"winner", "margin"}}."""
+        return {key: {"winner": row["winner"], "margin": row["margin"]}
+                for key, row in self._groups().items()}
+
+    def group_row(self, pod, player1, player2):
+        """Latest stored row for one group pairing, or None."""
+        return self._groups().get(match_key(pod, player1, player2))
+
+    def bracket_result(self, match_id):
+        row = self._brackets().get(match_id)
+        return {"winner": row.get("winner"), "margin": row.get("margin")} if row else {}
+
+    def bracket_winner(self, match_id):
+        return self.bracket_result(match_id).get("winner")
+
+    def bracket_is_stale(self):
+        """True when bracket results are the breaker's last good copy, not a live read."""
+        return TABLE_BREAKERS["bracket_matches"].stale
+
+    def bracket_winners(self):
+        """All decided bracket matches as {match_id: winner}."""
+        return {match_id: row["winner"] for match_id, row in self._brackets().items() if row.get("winner")}
+
+    # --- other tables ---
+    def bracket_progression(self):
+        return self.latest("bracket_progression") or {}
+
+    def bracket_df(self):
+        record = self.latest("bracket_data")
+        if not record:
+            return pd.DataFrame()
+        return pd.read_json(io.StringIO(record["json_data"]), orient="split")
+
+    # --- write-through ---
+    def record_match_row(self, row):
+        """
+        Patch a freshly written tournament_matches row into this run's tables and
+        the shared cache (same routing as the change feed), instead of dropping
+        the cached tables for every session.
+        """
+        for table, key in FEED_ROUTES["tournament_matches"]:
+            if key(row) is None:
+                continue
+            if self.cache:
+                self.cache.apply_rows(table, [row], key)
+            if table in self._tables:
+                self._tables[table] = [row] + [r for r in self._tables[table] if key(r) != key(row)]
+        self._group_index = self._bracket_index = None
+
+    def record_row(self, table, row):
+        if self.cache:
+            self.cache.invalidate(table)
+        if table in self._tables:
+            self._tables[table].insert(0, row)
+
+    def invalidate(self, *tables):
+        if self.cache:
+            self.cache.invalidate(*tables)
+        for table in tables or list(self._tables):
+            self._tables.pop(table, None)
+        if not tables or "tournament_matches" in tables:
+            self._group_index = self._bracket_index = None
+
+
+# --- Bulk writes ---
+def _missing_conflict_target(error):
+    # Postgres 42P10: no unique constraint matches ON CONFLICT (pod, player1, player2)
+    return getattr(error, "code", None) == "42P10" or "no unique or exclusion constraint" in str(error)
+
+
+def _without_id(batch):
+    # Inserts get a fresh id; a replayed offline row may still carry its old one
+    if isinstance(batch, list):
+        return [_without_id(row) for row in batch]
+    return {key: value for key, value in batch.items() if key != "id"}
+
+
+def upsert_match_rows(supabase, rows):
+    """
+    Upsert group results in one request. If the batch is rejected, retry the
+    rows one by one so a single bad row doesn't hide which ones went through.
+    Returns (saved_rows, failures) where failures is [(row, error message)].
+
+    Needs sql/tournament_matches_pair_key.sql. Until it is applied the rows
+    are inserted instead, as before it; readers already keep the newest row
+    per pairing (latest_match_results / latest_per_match).
+    """
+    if not rows:
+        return [], []
+    write = lambda batch: supabase.table("tournament_matches") \
+        .upsert(batch, on_conflict="pod,player1,player2").execute()
+    try:
+        response = write(rows)
+        return response.data or [], []
+    except Exception as e:
+        if _missing_conflict_target(e):
+            write = lambda batch: supabase.table("tournament_matches").insert(_without_id(batch)).execute()
+            try:
+                response = write(rows)
+                return response.data or [], []
+            except Exception:
+                pass
+
+    saved, failures = [], []
+    for row in rows:
+        try:
+            response = write(row)
+            if response.data:
+                saved.append(response.data[0])
+            else:
+                failures.append((row, "no row returned"))
+        except Exception as e:
+            failures.append((row, str(e)))
+    return saved, failures
+
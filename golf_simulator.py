@@ -1,7 +1,12 @@
 import streamlit as st
 import numpy as np
-from collections import Counter
 import matplotlib.pyplot as plt
+from collections import Counter
+from cache_helpers import get_simulation_cache
+from sim_helpers import (
+    simulate_matchplay_batch, simulate_strokeplay_batch, strokeplay_probabilities,
+    matchplay_distribution, hole_probabilities_normal, run_sharded, run_adaptive, outcome_counter
+)
 
 st.set_page_config(page_title="Golf Duel Simulator", layout="centered")
 
@@ -34,47 +39,30 @@ def assign_strokes(hcp1, hcp2):
     strokes = abs(round(hcp1 - hcp2))
     return np.array([1 if i < strokes else 0 for i in range(18)])
 
-def simulate_matchplay(player1, player2, simulations=10000):
-    results = {'P1 Wins': 0, 'P2 Wins': 0, 'Ties': 0}
+def run_monte_carlo(simulate, player1, player2, simulations, seed, tolerance=None, time_budget=None):
+    # With a tolerance, `simulations` is the cap and sampling stops once the odds are tight enough
+    if tolerance:
+        return run_adaptive(simulate, outcome_counter('P1 Wins', 'P2 Wins', 'Ties'), tolerance,
+                            max_simulations=simulations, time_budget=time_budget, seed=seed,
+                            player1=player1, player2=player2)
+    return run_sharded(simulate, simulations, seed, player1=player1, player2=player2)
+
+def simulate_matchplay(player1, player2, simulations=10000, engine="exact", seed=None, tolerance=None, time_budget=None):
+    if engine != "exact":
+        return run_monte_carlo(simulate_matchplay_batch, player1, player2, simulations, seed, tolerance, time_budget)
+    dist = matchplay_distribution(*hole_probabilities_normal(player1, player2))
     margins = Counter()
-    for _ in range(simulations):
-        p1_scores = np.random.normal(player1['avg'] / 18, player1['std'] / np.sqrt(18), 18)
-        p2_scores = np.random.normal(player2['avg'] / 18, player2['std'] / np.sqrt(18), 18)
-        p1_net = p1_scores - player1['strokes']
-        p2_net = p2_scores - player2['strokes']
-        match_score = 0
-        holes_remaining = 18
-        for h in range(18):
-            holes_remaining -= 1
-            if p1_net[h] < p2_net[h]:
-                match_score += 1
-            elif p2_net[h] < p1_net[h]:
-                match_score -= 1
-            if abs(match_score) > holes_remaining:
-                break
-        if match_score > 0:
-            results['P1 Wins'] += 1
-            margins[f"{abs(match_score)}&{holes_remaining + 1}"] += 1
-        elif match_score < 0:
-            results['P2 Wins'] += 1
-            margins[f"{abs(match_score)}&{holes_remaining + 1}"] += 1
-        else:
-            results['Ties'] += 1
-    results['Margins'] = margins
-    return results
-
-def simulate_strokeplay(player1, player2, simulations=10000):
-    results = {'P1 Wins': 0, 'P2 Wins': 0, 'Ties': 0}
-    for _ in range(simulations):
-        p1_total = np.random.normal(player1['avg'], player1['std']) - np.sum(player1['strokes'])
-        p2_total = np.random.normal(player2['avg'], player2['std']) - np.sum(player2['strokes'])
-        if p1_total < p2_total:
-            results['P1 Wins'] += 1
-        elif p2_total < p1_total:
-            results['P2 Wins'] += 1
-        else:
-            results['Ties'] += 1
-    return results
+    for (lead, holes_remaining), prob in dist['Margins'].items():
+        margins[f"{abs(lead)}&{holes_remaining + 1}"] += prob
+    return {'P1 Wins': dist['P1 Wins'], 'P2 Wins': dist['P2 Wins'], 'Ties': dist['Ties'], 'Margins': margins}
+
+def simulate_strokeplay(player1, player2, simulations=10000, engine="exact", rounding="integer", seed=None,
+                        tolerance=None, time_budget=None):
+    # The closed-form engine only covers the normal score model; anything else is simulated
+    models = {player1.get('model', 'normal'), player2.get('model', 'normal')}
+    if engine == "exact" and models == {'normal'}:
+        return strokeplay_probabilities(player1, player2, rounding)
+    return run_monte_carlo(simulate_strokeplay_batch, player1, player2, simulations, seed, tolerance, time_budget)
 
 def plot_win_chart(results, p1_name, p2_name):
     labels = [f"{p1_name} Wins", f"{p2_name} Wins", "Ties"]
@@ -119,6 +107,21 @@ with st.form("player_input"):
     course_rating = st.number_input("Course Rating", value=72.0)
     slope_rating = st.number_input("Slope Rating", value=130)
     play_format = st.radio("Play Format", ["Match Play", "Stroke Play"], index=0)
+    match_engine = st.radio("Match Play Engine", ["Exact (Markov chain)", "Monte Carlo"], index=0, horizontal=True)
+    simulations = st.select_slider("Simulations", options=[10000, 100000, 1000000], value=10000)
+    seed = int(st.number_input("Random Seed", value=0, step=1, help="Same inputs and seed give the same (cached) result."))
+    adaptive = st.checkbox("Adaptive simulation count", value=False,
+                           help="Simulate in batches and stop once every percentage is within the target precision. "
+                                "The Simulations value becomes the upper limit.")
+    precision = st.number_input("Target precision (± percentage points)", min_value=0.05, max_value=5.0, value=0.5, step=0.05)
+    time_budget = st.number_input("Time budget (seconds)", min_value=0.5, max_value=60.0, value=5.0, step=0.5)
+    score_model = st.radio(
+        "Stroke Play Score Model",
+        ["Normal (exact odds)", "Recorded scores (simulated)"],
+        index=0,
+        help="Normal odds are computed exactly with scores rounded to whole strokes. "
+             "Recorded scores resamples each player's last rounds."
+    )
 
     submitted = st.form_submit_button("🚀 Simulate Match")
 
@@ -140,17 +143,37 @@ if submitted:
             else:
                 p2_strokes = assign_strokes(p2_course_hcp, p1_course_hcp)
                 p1_strokes = np.zeros(18)
-            player1 = {'name': p1_name, 'avg': p1_avg, 'std': p1_std, 'strokes': p1_strokes}
-            player2 = {'name': p2_name, 'avg': p2_avg, 'std': p2_std, 'strokes': p2_strokes}
+            model = 'normal' if score_model.startswith("Normal") else 'empirical'
+            player1 = {'name': p1_name, 'avg': p1_avg, 'std': p1_std, 'strokes': p1_strokes,
+                       'scores': p1_scores, 'model': model}
+            player2 = {'name': p2_name, 'avg': p2_avg, 'std': p2_std, 'strokes': p2_strokes,
+                       'scores': p2_scores, 'model': model}
+            engine = "exact" if match_engine.startswith("Exact") else "monte_carlo"
+            tolerance = precision / 100 if adaptive else None
+            cache_inputs = {
+                "format": play_format, "engine": engine, "tolerance": tolerance,
+                "time_budget": time_budget if adaptive else None,
+                "player1": {k: v for k, v in player1.items() if k != 'name'},
+                "player2": {k: v for k, v in player2.items() if k != 'name'},
+            }
             if play_format == "Match Play":
-                results = simulate_matchplay(player1, player2)
+                compute = lambda: simulate_matchplay(player1, player2, simulations, engine, seed, tolerance, time_budget)
             else:
-                results = simulate_strokeplay(player1, player2)
+                compute = lambda: simulate_strokeplay(player1, player2, simulations, seed=seed,
+                                                      tolerance=tolerance, time_budget=time_budget)
+            results = get_simulation_cache().get_or_compute("golf_duel", cache_inputs, compute, simulations, seed)
+            # Exact results are already probabilities; simulated ones are counts
+            pct = 100 / results.get('Simulations', 1)
             st.success("✅ Simulation complete!")
             col1, col2, col3 = st.columns(3)
-            col1.metric(f"{p1_name} Wins", f"{results['P1 Wins'] / 100:.1f}%")
-            col2.metric(f"{p2_name} Wins", f"{results['P2 Wins'] / 100:.1f}%")
-            col3.metric("Tied Matches", f"{results['Ties'] / 100:.1f}%")
+            col1.metric(f"{p1_name} Wins", f"{results['P1 Wins'] * pct:.1f}%")
+            col2.metric(f"{p2_name} Wins", f"{results['P2 Wins'] * pct:.1f}%")
+            col3.metric("Tied Matches", f"{results['Ties'] * pct:.1f}%")
+            if 'Intervals' in results:
+                low_high = {k: f"{lo * 100:.1f}–{hi * 100:.1f}%" for k, (lo, hi) in results['Intervals'].items()}
+                status = "target precision reached" if results['Converged'] else "stopped at the simulation or time limit"
+                st.caption(f"95% intervals after {results['Simulations']:,} simulations ({status}): "
+                           f"{p1_name} {low_high['P1 Wins']} · {p2_name} {low_high['P2 Wins']} · Ties {low_high['Ties']}")
             st.subheader("📊 Win Probability Chart")
             plot_win_chart(results, p1_name, p2_name)
             if play_format == "Match Play" and 'Margins' in results:
@@ -159,7 +182,7 @@ if submitted:
                 margin_data = results['Margins'].items()
                 sorted_margins = sorted(margin_data, key=lambda x: (int(x[0].split('&')[1]), int(x[0].split('&')[0])))
                 df_margins = pd.DataFrame(sorted_margins, columns=["Margin", "Count"])
-                df_margins["Frequency"] = df_margins["Count"] / 100
+                df_margins["Frequency"] = df_margins["Count"] * pct
                 st.dataframe(df_margins.style.format({"Frequency": "{:.1f}%"}))
                 st.bar_chart(df_margins.set_index("Margin")["Count"])
     except Exception as e:
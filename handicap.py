@@ -4,28 +4,18 @@ import numpy as np
 import pandas as pd
 import matplotlib.pyplot as plt
 from scipy.stats import truncnorm
+from cache_helpers import get_simulation_cache
+from sim_helpers import (
+    allocate_strokes, sample_hole_scores, hole_outcome_probabilities, matchplay_distribution,
+    count_match_play_batch, margin_shares, outcome_counter, COURSES, run_sharded, run_adaptive
+)
 
 st.set_page_config(page_title="Golf Probability Forecaster", layout="centered")
 st.title("\U0001F3CC️ Golf Probability Forecaster")
 st.markdown("Enter your golf stats to calculate the probability of your score.")
 
 # Course data
-courses = {
-    "Cypress": {
-        "yardages": [367, 355, 504, 164, 366, 539, 125, 387, 346, 338, 525, 398, 353, 128, 418, 163, 397, 426],
-        "handicaps": [7, 13, 11, 15, 1, 5, 17, 3, 9, 10, 12, 4, 14, 18, 2, 16, 8, 6],
-        "pars": [4, 4, 5, 3, 4, 5, 3, 4, 4, 4, 5, 4, 4, 3, 4, 3, 4, 5],
-        "slope": 130,
-        "rating": 71.3
-    },
-    "Pecan": {
-        "yardages": [349, 488, 328, 179, 420, 539, 167, 396, 437, 375, 542, 358, 137, 353, 480, 189, 424, 388],
-        "handicaps": [7, 17, 11, 15, 5, 1, 13, 9, 3, 8, 6, 14, 16, 10, 18, 12, 4, 2],
-        "pars": [4, 5, 4, 3, 4, 5, 3, 4, 4, 4, 5, 4, 3, 4, 5, 3, 4, 4],
-        "slope": 132,
-        "rating": 72.0
-    }
-}
+courses = COURSES
 
 mode = st.radio("Choose Format", ["Stroke Play", "Match Play"], horizontal=True)
 course_choice = st.selectbox("Select Course", list(courses.keys()))
@@ -52,39 +42,45 @@ with col2:
     else:
         handicap_index_2 = st.number_input(f"{player_b_name} Handicap Index", min_value=-10.0, max_value=40.0, value=10.0, step=0.1)
 
+if mode == "Match Play":
+    engine = st.radio("Probability Engine", ["Exact", "Simulation"], horizontal=True,
+                      help="Exact solves the match as a Markov chain over holes and match score.")
+    if engine == "Simulation":
+        seed = int(st.number_input("Random Seed", value=0, step=1))
+        adaptive = st.checkbox("Adaptive simulation count",
+                               help="Keep simulating (up to 100,000 matches) until each win probability "
+                                    "is within the target precision.")
+        precision = st.number_input("Target precision (± percentage points)", min_value=0.1, max_value=5.0,
+                                    value=1.0, step=0.1, disabled=not adaptive)
+
 def get_std_dev(handicap_index):
     return [2.5, 3.5, 4.5, 5.5, 6.5][min(int(handicap_index // 5), 4)]
 
-def get_hole_std_dev(handicap_index):
-    return [0.6, 0.8, 1.0, 1.2, 1.4][min(int(handicap_index // 5), 4)]
-
-def simulate_hole_score(par, handicap_index):
-    mean_score = par + (handicap_index / 18.0)
-    std_dev = get_hole_std_dev(handicap_index)
-    lower, upper = par - 1, par + 4
-    a = (lower - mean_score) / std_dev
-    b = (upper - mean_score) / std_dev
-    dist = truncnorm(a, b, loc=mean_score, scale=std_dev)
-    return round(dist.rvs())
-
-def allocate_strokes(h1, h2, hole_handicaps):
-    diff = int(round(h1 - h2))
-    strokes = [0] * 18
-    if diff > 0:
-        sorted_holes = sorted(range(18), key=lambda x: hole_handicaps[x])
-        for i in range(diff):
-            strokes[sorted_holes[i % 18]] += 1
-    return strokes
+def summarize_match_counts(counts):
+    """Outcome shares from merged count_match_play_batch counts, keyed like matchplay_distribution."""
+    simulations = counts["Simulations"]
+    summary = {
+        "Simulations": simulations,
+        "Margins": margin_shares(counts["Margins"], simulations),
+        "Ties": counts["Ties"] / simulations,
+        "Hole Wins P1": counts["Hole Wins P1"] / simulations,
+        "Hole Wins P2": counts["Hole Wins P2"] / simulations,
+    }
+    if "Intervals" in counts:
+        summary["Intervals"] = counts["Intervals"]
+    return summary
 
 def simulate_match_play(pars, hole_handicaps, hcp1, hcp2):
     strokes_p1 = allocate_strokes(hcp1, hcp2, hole_handicaps)
     strokes_p2 = allocate_strokes(hcp2, hcp1, hole_handicaps)
+    p1_gross = sample_hole_scores(pars, hcp1, 1)[0]
+    p2_gross = sample_hole_scores(pars, hcp2, 1)[0]
     holes, p1_wins, p2_wins = [], 0, 0
     match_result = "All Square"
 
     for i in range(18):
-        p1_score = simulate_hole_score(pars[i], hcp1) - strokes_p1[i]
-        p2_score = simulate_hole_score(pars[i], hcp2) - strokes_p2[i]
+        p1_score = int(p1_gross[i]) - strokes_p1[i]
+        p2_score = int(p2_gross[i]) - strokes_p2[i]
 
         if p1_score < p2_score:
             result = f"{player_a_name} wins"
@@ -146,52 +142,82 @@ if st.button("Calculate Probability", key="calc_prob_1"):
         styled_df = df.style.applymap(highlight_match_over)
         st.dataframe(styled_df, use_container_width=True)
         st.caption("‘X’ indicates holes not played due to early match conclusion.")
-# Additional: Run multiple simulations to estimate outcome probabilities
-        sim_results = []
-        for _ in range(1000):
-            _, sim_result = simulate_match_play(hole_pars, hole_handicaps, handicap_index_1, handicap_index_2)
-            sim_results.append(sim_result)
+# Additional: estimate outcome probabilities
+        if engine == "Exact":
+            strokes_p1 = allocate_strokes(handicap_index_1, handicap_index_2, hole_handicaps)
+            strokes_p2 = allocate_strokes(handicap_index_2, handicap_index_1, hole_handicaps)
+            dist = matchplay_distribution(*hole_outcome_probabilities(
+                hole_pars, handicap_index_1, handicap_index_2, strokes_p1, strokes_p2
+            ))
+            margins = dist["Margins"]
+            ties = dist["Ties"]
+            win_holes_p1 = dist["Hole Wins P1"] * 100
+            win_holes_p2 = dist["Hole Wins P2"] * 100
+            basis = "exact"
+        else:
+            # One simulation pass feeds the table, the cumulative odds and the heatmap
+            if adaptive:
+                compute = lambda: run_adaptive(
+                    count_match_play_batch, outcome_counter("P1 Wins", "P2 Wins", "Ties"), precision / 100,
+                    max_simulations=100000, time_budget=10, seed=seed,
+                    pars=hole_pars, hole_handicaps=hole_handicaps, hcp1=handicap_index_1, hcp2=handicap_index_2
+                )
+            else:
+                compute = lambda: run_sharded(count_match_play_batch, 1000, seed,
+                                              pars=hole_pars, hole_handicaps=hole_handicaps,
+                                              hcp1=handicap_index_1, hcp2=handicap_index_2)
+            # Shards merge as counts, so the summary is small whatever the simulation count
+            batch = get_simulation_cache().get_or_compute(
+                "match_play_summary",
+                {"course": course_choice, "pars": hole_pars, "handicaps": hole_handicaps,
+                 "hcp1": handicap_index_1, "hcp2": handicap_index_2,
+                 "tolerance": precision / 100 if adaptive else None},
+                lambda: summarize_match_counts(compute()), simulations=1000, seed=seed
+            )
+            simulations = batch["Simulations"]
+            margins = batch["Margins"]
+            ties = batch["Ties"]
+            win_holes_p1 = batch["Hole Wins P1"] * 100
+            win_holes_p2 = batch["Hole Wins P2"] * 100
+            basis = f"based on {simulations:,} simulations"
+
+        result_probs = pd.Series({
+            f"{player_a_name if lead > 0 else player_b_name} wins {abs(lead)}&{holes_remaining}": prob
+            for (lead, holes_remaining), prob in margins.items()
+        })
+        result_probs["All Square"] = ties
+        win_probs = {
+            player_a_name: sum(p for (lead, _), p in margins.items() if lead > 0),
+            player_b_name: sum(p for (lead, _), p in margins.items() if lead < 0),
+            "All Square": ties
+        }
 
-        result_counts = pd.Series(sim_results).value_counts().reset_index()
-        result_counts.columns = ["Match Result", "Frequency"]
-        result_counts["Probability"] = (result_counts["Frequency"] / len(sim_results) * 100).round(2)
+        result_counts = result_probs.sort_values(ascending=False).reset_index()
+        result_counts.columns = ["Match Result", "Probability"]
+        result_counts["Probability"] = (result_counts["Probability"] * 100).round(2)
 
-        st.markdown("### 🔁 Match Result Probabilities (based on 1,000 simulations)")
+        st.markdown(f"### 🔁 Match Result Probabilities ({basis})")
         st.dataframe(result_counts, use_container_width=True)
 # Cumulative win probabilities
-        total = len(sim_results)
-        win_counts = {
-            player_a_name: sum(1 for r in sim_results if r.startswith(player_a_name)),
-            player_b_name: sum(1 for r in sim_results if r.startswith(player_b_name)),
-            "All Square": sum(1 for r in sim_results if r == "All Square")
-        }
-
         st.markdown("### 🧮 Cumulative Win Probabilities")
-        st.markdown(f"- **{player_a_name} wins:** {win_counts[player_a_name] / total * 100:.1f}%")
-        st.markdown(f"- **{player_b_name} wins:** {win_counts[player_b_name] / total * 100:.1f}%")
-        st.markdown(f"- **All Square:** {win_counts['All Square'] / total * 100:.1f}%")
-
-        # Hole-by-hole win heatmap: count wins per hole
-        win_holes_p1 = np.zeros(18)
-        win_holes_p2 = np.zeros(18)
-
-        for _ in range(1000):
-            holes, result = simulate_match_play(hole_pars, hole_handicaps, handicap_index_1, handicap_index_2)
-            for hole in holes:
-                if hole["Result"] == f"{player_a_name} wins":
-                    if isinstance(hole["Hole"], int):
-                        win_holes_p1[hole["Hole"] - 1] += 1
-                elif hole["Result"] == f"{player_b_name} wins":
-                    if isinstance(hole["Hole"], int):
-                        win_holes_p2[hole["Hole"] - 1] += 1
+        st.markdown(f"- **{player_a_name} wins:** {win_probs[player_a_name] * 100:.1f}%")
+        st.markdown(f"- **{player_b_name} wins:** {win_probs[player_b_name] * 100:.1f}%")
+        st.markdown(f"- **All Square:** {win_probs['All Square'] * 100:.1f}%")
+        if engine == "Simulation" and "Intervals" in batch:
+            intervals = batch["Intervals"]
+            st.caption(
+                f"95% intervals: {player_a_name} {intervals['P1 Wins'][0] * 100:.1f}–{intervals['P1 Wins'][1] * 100:.1f}% · "
+                f"{player_b_name} {intervals['P2 Wins'][0] * 100:.1f}–{intervals['P2 Wins'][1] * 100:.1f}% · "
+                f"All Square {intervals['Ties'][0] * 100:.1f}–{intervals['Ties'][1] * 100:.1f}%"
+            )
 
         win_df = pd.DataFrame({
             "Hole": np.arange(1, 19),
-            f"{player_a_name} Wins": win_holes_p1,
-            f"{player_b_name} Wins": win_holes_p2
+            f"{player_a_name} Wins %": win_holes_p1,
+            f"{player_b_name} Wins %": win_holes_p2
         })
 
-        st.markdown("### 🔥 Hole-by-Hole Win Heatmap (across 1,000 simulations)")
+        st.markdown(f"### 🔥 Hole-by-Hole Win Heatmap ({basis})")
         st.bar_chart(win_df.set_index("Hole"))
 
     else:
@@ -0,0 +1,98 @@
+# http_helpers.py
+# Pooled, concurrent reads against Supabase's REST (PostgREST) endpoint.
+# The supabase client runs one blocking request at a time on the script
+# thread; here independent table reads go out together over a shared
+# httpx.AsyncClient, so a page waits for its slowest query, not the sum.
+
+import asyncio
+import threading
+
+import httpx
+
+from data_helpers import BRACKET_MATCH_COLUMNS, BRACKET_MATCH_RANGE, GROUP_MATCH_COLUMNS
+
+
+def _select(columns):
+    # data_helpers column lists are "a, b, c"; PostgREST wants "a,b,c"
+    return ",".join(column.strip() for column in columns.split(","))
+
+
+# Query specs for the tables the app reads, in PostgREST terms; the same
+# columns and ranges as the data_helpers fetchers they stand in for.
+# filters are (column, "op.value") pairs, e.g. ("match_id", "gte.100").
+TABLE_QUERIES = {
+    "players": {"table": "players"},
+    "tournament_matches": {"table": "tournament_matches", "order": "created_at.desc"},
+    "latest_match_results": {"table": "latest_match_results",
+                             "select": _select(GROUP_MATCH_COLUMNS),
+                             "order": "created_at.desc"},
+    "bracket_matches": {"table": "tournament_matches", "select": _select(BRACKET_MATCH_COLUMNS),
+                        "filters": [("match_id", f"gte.{BRACKET_MATCH_RANGE[0]}"),
+                                    ("match_id", f"lte.{BRACKET_MATCH_RANGE[1]}")]},
+    "bracket_progression": {"table": "bracket_progression", "order": "created_at.desc", "limit": 1},
+    "bracket_data": {"table": "bracket_data", "select": "json_data", "order": "timestamp.desc", "limit": 1},
+    "predictions": {"table": "predictions", "order": "timestamp.desc"},
+    "final_results": {"table": "final_results", "order": "created_at.desc", "limit": 1},
+}
+
+
+class AsyncTableClient:
+    """Read-only PostgREST client on one pooled httpx.AsyncClient."""
+
+    def __init__(self, url, key, max_connections=10, timeout=10.0):
+        self._client = httpx.AsyncClient(
+            base_url=f"{url.rstrip('/')}/rest/v1",
+            headers={"apikey": key, "Authorization": f"Bearer {key}"},
+            limits=httpx.Limits(max_connections=max_connections,
+                                max_keepalive_connections=max_connections),
+            timeout=timeout,
+        )
+
+    async def select(self, table, select="*", order=None, limit=None, filters=()):
+        params = [("select", select)]
+        params += list(filters)
+        if order:
+            params.append(("order", order))
+        if limit:
+            params.append(("limit", str(limit)))
+        response = await self._client.get(f"/{table}", params=params)
+        response.raise_for_status()
+        return response.json()
+
+    async def fetch_tables(self, names):
+        """{name: rows or Exception} for TABLE_QUERIES entries, fetched concurrently."""
+        results = await asyncio.gather(
+            *(self.select(**TABLE_QUERIES[name]) for name in names), return_exceptions=True
+        )
+        return dict(zip(names, results))
+
+    async def aclose(self):
+        await self._client.aclose()
+
+
+class PooledReader:
+    """
+    Sync facade for Streamlit: owns an event loop on a background thread and
+    blocks the calling script only until the whole batch is back.
+    """
+
+    def __init__(self, url, key, max_connections=10, timeout=10.0):
+        self._loop = asyncio.new_event_loop()
+        self._thread = threading.Thread(target=self._loop.run_forever, name="supabase-pool", daemon=True)
+        self._thread.start()
+        self.client = self.run(self._make_client(url, key, max_connections, timeout))
+
+    @staticmethod
+    async def _make_client(url, key, max_connections, timeout):
+        # Created on the loop thread so the pool belongs to that loop
+        return AsyncTableClient(url, key, max_connections, timeout)
+
+    def run(self, coro, timeout=None):
+        return asyncio.run_coroutine_threadsafe(coro, self._loop).result(timeout)
+
+    def fetch_tables(self, names):
+        return self.run(self.client.fetch_tables(list(names))) if names else {}
+
+    def close(self):
+        self.run(self.client.aclose())
+        self._loop.call_soon_threadsafe(self._loop.stop)
@@ -2,14 +2,24 @@ import streamlit as st
 st.set_page_config(page_title="Golf Match Play Tournament", layout="wide")
 import pandas as pd
 from collections import defaultdict
+import copy
 import io
 import json
 import os
+import time
 from datetime import datetime
 from supabase import create_client
 import hashlib
 import re
 from datetime import datetime, timezone
+from tournament_data import pods as tournament_pods
+from odds_helpers import FINAL_MATCH_ID, OddsTable, compute_odds_matrix, flatten_players, format_odds, simulate_tournament
+from standings_helpers import StandingsEngine
+from bracket_state import BracketState
+from http_helpers import PooledReader
+from offline_helpers import DEFAULT_STORE_PATH, LocalStore, SupabaseBackend, SyncWorker
+from prediction_helpers import PredictionScorer, pool_odds, row_slots
+from data_helpers import ChangeFeed, PredictionNameIndex, TournamentSnapshot, get_table_cache, match_key as result_key, missing_column, upsert_match_rows
 
 PREDICTION_DEADLINE = datetime.fromisoformat(
     st.secrets["predictions"]["deadline"].replace("Z", "+00:00")
@@ -26,6 +36,39 @@ def init_supabase():
 
 supabase = init_supabase()
 
+# Pooled async reader for batched table loads; pool size from secrets ([supabase] pool_size)
+@st.cache_resource
+def init_reader():
+    return PooledReader(st.secrets["supabase"]["url"], st.secrets["supabase"]["key"],
+                        max_connections=int(st.secrets["supabase"].get("pool_size", 10)))
+
+# Offline-first scoring ([offline] enabled = true in secrets): reads and writes hit a local
+# SQLite mirror and a background worker syncs it with Supabase when the connection is up
+@st.cache_resource
+def init_offline_store():
+    offline = st.secrets.get("offline", {})
+    if not offline.get("enabled", False):
+        return None, None
+    store = LocalStore(offline.get("path", DEFAULT_STORE_PATH))
+    worker = SyncWorker(store, SupabaseBackend(supabase), interval=int(offline.get("sync_seconds", 10)))
+    return store, worker.start()
+
+offline_store, offline_sync = init_offline_store()
+
+# One snapshot per script run: each table is fetched at most once and every tab reads from it.
+# The table cache behind it is shared by all sessions, so spectators reuse each other's fetches.
+snapshot = TournamentSnapshot(supabase, cache=get_table_cache(), reader=init_reader(), store=offline_store)
+# Every tab renders on each run, so load what they read in one concurrent round
+snapshot.prefetch("latest_match_results", "bracket_matches", "bracket_progression",
+                  "bracket_data", "predictions", "final_results")
+
+# --- Writes to tournament_matches (local store first when offline mode is on) ---
+def write_match_rows(rows):
+    """Returns (saved_rows, [(row, error)])."""
+    if offline_store is not None:
+        return [offline_store.write("tournament_matches", row) for row in rows], []
+    return upsert_match_rows(supabase, rows)
+
 #--- new save bracket function to shared table --
 def save_bracket_result(match_id, round_name, player1, player2, winner, margin, status="completed"):
     try:
@@ -40,11 +83,16 @@ def save_bracket_result(match_id, round_name, player1, player2, winner, margin,
             "updated_at": datetime.utcnow().isoformat()
         }
 
-        response = supabase.table("tournament_matches") \
-            .upsert(data, on_conflict="match_id") \
-            .execute()
+        if offline_store is not None:
+            saved = [offline_store.write("tournament_matches", data)]
+        else:
+            response = supabase.table("tournament_matches") \
+                .upsert(data, on_conflict="match_id") \
+                .execute()
+            saved = response.data if response else None
 
-        if response and response.data:
+        if saved:
+            snapshot.record_match_row(saved[0])
             st.success(f"✅ Match {match_id} saved: {winner} wins")
         else:
             st.warning(f"⚠️ No response data returned for match {match_id}")
@@ -60,6 +108,7 @@ def save_bracket_data(df):
         response = supabase.table("bracket_data").insert({"json_data": json_data}).execute()
 
         if response.status_code == 200 and response.data:
+            snapshot.record_row("bracket_data", response.data[0])
             st.success("✅ Bracket data saved successfully to Supabase.")
             return response.data  # Return the inserted data or a success indicator
         else:
@@ -72,37 +121,12 @@ def save_bracket_data(df):
 # --- load bracket match results ---
 def load_bracket_match_result(match_id):
     try:
-        response = supabase.table("tournament_matches") \
-            .select("winner, margin") \
-            .eq("match_id", match_id) \
-            .limit(1) \
-            .execute()
-
-        if response.data and len(response.data) > 0:
-            return response.data[0]
-        return {}
+        return snapshot.bracket_result(match_id)
     except Exception as e:
         st.warning(f"⚠️ Could not load match {match_id}: {e}")
         return {}
 
 
-# --- Helper: Parse JSON field ---
-def parse_json_field(field):
-    try:
-        st.write("👀 Field type:", type(field), "→", field)
-        if isinstance(field, str):
-            return json.loads(field)
-        elif isinstance(field, list):
-            return field
-        elif isinstance(field, dict):  # Supabase jsonb might come as dict
-            return list(field.values())  # flatten if needed
-        return []
-    except Exception as e:
-        st.warning(f"⚠️ Failed to parse field: {e}")
-        return []
-
-
-
 def get_player_by_name(name, source_df):
     return next((p for p in source_df.to_dict("records") if p["name"] == name), {"name": name})
 
@@ -127,66 +151,12 @@ def get_players_by_names(source_players, names):
     # Return the full player records in the same order
     return [name_lookup.get(name, {"name": name, "handicap": "N/A"}) for name in names]
 
-# --- Compute standings dynamically from match results ---
-def compute_pod_standings_from_results(pods, match_results):
-    pod_scores = {}
-
-    # Define the margin lookup as a dictionary (you've provided this)
-    margin_lookup = {
-        "1 up": 1, "2 and 1": 3, "3 and 2": 5, "4 and 3": 7,
-        "5 and 4": 9, "6 and 5": 11, "7 and 6": 13, "8 and 7": 15, "9 and 8": 17
-    }
-
-    for pod_name, players in pods.items():
-        results = []
-        for player in players:
-            name = player["name"]
-            points, margin = 0, 0
-
-            # Iterate through all match results and calculate points and margins
-            for key, result in match_results.items():
-                if key.startswith(f"{pod_name}|") and name in key:
-                    winner = result.get("winner")
-                    # Get the margin string (e.g., "1 up", "2 and 1")
-                    margin_str = result.get("margin", "Tie")  # Default to "Tie" if no margin
-
-                    # Convert margin string to a numeric value
-                    if margin_str != "Tie":
-                        margin_value = margin_lookup.get(margin_str, 0)  # Get corresponding numeric value, default to 0 if not found
-                    else:
-                        margin_value = 0
-
-                    if winner == name:
-                        points += 1
-                        margin += margin_value  # Safely add margin
-                    elif winner == "Tie":
-                        points += 0.5
-                    else:
-                        margin -= margin_value  # Safely subtract margin
-
-            results.append({
-                "name": name,
-                "handicap": player["handicap"],
-                "points": points,
-                "margin": margin
-            })
-
-        pod_scores[pod_name] = pd.DataFrame(results)
-
-    return pod_scores
-
 # --- Fetch the most recent match results from Supabase ---
 def load_most_recent_match_results():
     try:
-        # Fetch the latest match results directly from Supabase
-        response = supabase.table("tournament_matches") \
-            .select("*") \
-            .order("created_at", desc=True) \
-            .limit(1) \
-            .execute()
-
-        if response.data:
-            return response.data[0]  # Return the most recent match result
+        most_recent = snapshot.latest("latest_match_results")
+        if most_recent:
+            return most_recent
         else:
             st.warning("No match results found.")
             return None
@@ -199,15 +169,8 @@ def load_most_recent_match_results():
 # --- Fetch the entire match result log ---
 def load_match_result_log():
     try:
-        # Fetch all match results, ordered by created_at
-        response = supabase.table("tournament_matches").select("*") \
-            .order("created_at", desc=True).execute()
-
-        if response.data:
-            match_results = {f"{r['pod']}|{r['player1']} vs {r['player2']}": {
-                "winner": r["winner"],
-                "margin": r["margin"]
-            } for r in response.data}
+        match_results = snapshot.group_results()
+        if match_results:
 
             st.write("📋 Match Results Log")
 
@@ -309,8 +272,9 @@ def load_round_players(round_key, progression_data, source_players=None):
         source_players = pods  # fallback to global pods
 
     try:
-        # Get player names from progression data
-        names = parse_json_field(progression_data.get(round_key, "[]"))
+        # Get player names from the bracket state
+        state = BracketState.from_record(progression_data, load_bracket_winners())
+        names = state.round_names(round_key) if state else []
         
         # Ensure players are full dictionaries
         players = get_players_by_names(source_players, names)
@@ -337,6 +301,7 @@ margin_lookup = {
 def save_bracket_progression_to_supabase(data: dict):
     try:
         response = supabase.table("bracket_progression").insert(data).execute()
+        snapshot.record_row("bracket_progression", (response.data or [data])[0])
         st.write("✅ Supabase insert response:", response.data)  # optional debug
     except Exception as e:
         st.error(f"Supabase save failed: {e}")
@@ -345,74 +310,46 @@ def save_bracket_progression_to_supabase(data: dict):
 
 
 def save_match_result(pod, player1, player2, winner, margin_str):
+    """Upsert one group result on (pod, player1, player2); returns the stored row."""
     # Convert margin string to numeric
     if margin_str != "Tie":
         margin_value = margin_lookup.get(margin_str, 0)
     else:
         margin_value = 0
 
-    # Prepare the data to save
-    data = {
-        "pod": pod,
-        "player1": player1,
-        "player2": player2,
-        "winner": winner,
-        "margin": margin_value,  
-        "created_at": datetime.utcnow().isoformat()
-    }
-
     try:
-        # Check if a match result already exists based on pod, player1, and player2
-        response = supabase.table("tournament_matches").select("*") \
-            .eq("pod", pod) \
-            .eq("player1", player1) \
-            .eq("player2", player2) \
-            .execute()
-
-        if response.data and len(response.data) > 0:
-            # Match exists, so update it
-            update_response = supabase.table("tournament_matches") \
-                .update(data) \
-                .eq("pod", pod) \
-                .eq("player1", player1) \
-                .eq("player2", player2) \
-                .execute()
+        # Reruns re-submit every checked match; skip the write when nothing changed
+        stored = snapshot.group_row(pod, player1, player2)
+        if stored and stored["winner"] == winner and stored["margin"] == margin_value:
+            return stored
 
-            if update_response.data:
-                st.success(f"Result updated: {winner} wins {margin_str}")
-            else:
-                st.error("❌ Error updating match result.")
-        else:
-            # Match does not exist, so insert it
-            insert_response = supabase.table("tournament_matches").insert(data).execute()
-
-            if insert_response.data:
-                st.success(f"Result saved: {winner} wins {margin_str}")
-            else:
-                st.error("❌ Error saving match result.")
+        data = {
+            "pod": pod,
+            "player1": player1,
+            "player2": player2,
+            "winner": winner,
+            "margin": margin_value,
+            "created_at": datetime.utcnow().isoformat()
+        }
+        # One round trip; an upsert once sql/tournament_matches_pair_key.sql is applied
+        saved, failures = write_match_rows([data])
 
-        # Refresh the match result log after saving/updating the result
-        load_match_result_log()  # Reload the log with the updated result
+        if saved:
+            row = saved[0]
+            snapshot.record_match_row(row)
+            st.success(f"Result saved: {winner} wins {margin_str}")
+            return row
+        st.error(f"❌ Error saving match result: {failures[0][1] if failures else 'no row returned'}")
 
     except Exception as e:
         st.error(f"❌ Error saving match result: {str(e)}")
+    return None
 
 # Define the function to load bracket data from Supabase
 def load_bracket_data_from_supabase():
     try:
-        response = (
-            supabase.table("bracket_data")
-            .select("json_data")
-            .order("timestamp", desc=True)
-            .limit(1)
-            .execute()
-        )
-
-        #st.write("📦 Raw Supabase response:", response.data)  # <--- DEBUG LINE
-
-        if response.data and len(response.data) > 0:
-            bracket_df = pd.read_json(response.data[0]["json_data"], orient="split")
-            #st.write("✅ Parsed Bracket DataFrame:", bracket_df)  # <--- DEBUG LINE
+        bracket_df = snapshot.bracket_df()
+        if not bracket_df.empty:
             return bracket_df
         else:
             st.warning("No bracket data found.")
@@ -489,6 +426,7 @@ def render_bracket_match_ui(match_id, round_name, player1, player2):
 
     st.markdown(f"### {round_name} – Match {match_id}")
     st.write(f"**{player1} vs {player2}**")
+    st.caption(format_odds(odds_table.lookup(player1, player2), player1, player2))
 
     if st.session_state.authenticated:
         winner = st.selectbox(
@@ -523,28 +461,22 @@ def render_bracket_match_ui(match_id, round_name, player1, player2):
             st.info("⏳ Match not yet decided.")
 
 
-# ---- Get winner from bracket ---
-import time
-
-def get_bracket_winner(match_id, retries=3, delay=1):
-    for attempt in range(retries):
-        try:
-            response = supabase.table("tournament_matches") \
-                .select("winner") \
-                .eq("match_id", match_id) \
-                .limit(1) \
-                .execute()
+# ---- Bracket winners (all bracket matches come from one batched fetch per run) ---
+def get_bracket_winner(match_id):
+    try:
+        return snapshot.bracket_winner(match_id)
+    except Exception as e:
+        st.warning(f"⚠️ Could not fetch winner for match {match_id}: {e}")
+        return None
 
-            if response.data and len(response.data) > 0:
-                return response.data[0]["winner"]
-            return None
 
-        except Exception as e:
-            if attempt < retries - 1:
-                time.sleep(delay)
-            else:
-                st.warning(f"⚠️ Could not fetch winner for match {match_id}: {e}")
-                return None
+# --- All decided bracket winners (match_id -> winner) ---
+def load_bracket_winners():
+    try:
+        return snapshot.bracket_winners()
+    except Exception as e:
+        st.warning(f"⚠️ Could not load bracket winners: {e}")
+        return {}
 
 
 #--- resolve tiebreakers --
@@ -602,50 +534,6 @@ margin_lookup = {
     "5 and 4": 9, "6 and 5": 11, "7 and 6": 13, "8 and 7": 15, "9 and 8": 17
 }
 
-def compute_pod_standings_from_results(pods, match_results):
-    pod_scores = {}
-
-    for pod_name, players in pods.items():
-        results = []
-        for player in players:
-            name = player["name"]
-            points, margin = 0, 0
-
-            # Iterate through all match results and calculate points and margins
-            for key, result in match_results.items():
-                if key.startswith(f"{pod_name}|") and name in key:
-                    winner = result.get("winner")
-                    margin_str = result.get("margin", "Tie")  # Default to "Tie" if no margin
-
-                    # Ensure margin is numeric
-                    if isinstance(margin_str, str):
-                        # If margin_str is a string like "1 up", "2 and 1", etc., look it up
-                        margin_value = margin_lookup.get(margin_str, 0)  # Default to 0 if not found in lookup
-                    else:
-                        margin_value = margin_str  # If it's already numeric, use it directly
-
-                    # Update points and margin based on the winner
-                    if winner == name:
-                        points += 1
-                        margin += margin_value  # Add margin for the winner
-                    elif winner == "Tie":
-                        points += 0.5  # Tie gives half a point
-                    else:
-                        margin -= margin_value  # Subtract margin for the loser
-
-            results.append({
-                "name": name,
-                "handicap": player["handicap"],
-                "points": points,
-                "margin": margin
-            })
-
-        pod_scores[pod_name] = pd.DataFrame(results)
-
-    return pod_scores
-
-
-
 # --- Build bracket from scores and tiebreaks ---
 def build_bracket_df_from_pod_scores(pod_scores, tiebreak_selections):
     winners, second_place = [], []
@@ -687,6 +575,66 @@ def build_bracket_df_from_pod_scores(pod_scores, tiebreak_selections):
 
     return bracket_df
 
+# --- Write-behind queue for group stage entry ---
+# Entries only touch session state; changed results are sent in one bulk upsert
+# when the admin saves the pod, or by autosave_pending_results once edits have
+# been idle for the debounce window.
+WRITE_BEHIND_DEBOUNCE = 20  # seconds since the last edit before an automatic flush
+WRITE_BEHIND_CHECK_SECONDS = 5
+
+def queue_match_result(pod, player1, player2, winner, margin):
+    pending = st.session_state.setdefault("pending_results", {})
+    key = result_key(pod, player1, player2)
+    try:
+        stored = snapshot.group_row(pod, player1, player2)
+    except Exception:
+        stored = None
+    if stored and stored["winner"] == winner and stored["margin"] == margin:
+        pending.pop(key, None)  # edited back to what's saved
+        return
+    previous = pending.get(key)
+    if previous and previous["winner"] == winner and previous["margin"] == margin:
+        return
+    pending[key] = {"pod": pod, "player1": player1, "player2": player2,
+                    "winner": winner, "margin": margin}
+    st.session_state.pending_changed_at = time.time()
+
+
+def flush_pending_results(pod=None):
+    """
+    Send queued results (optionally one pod's) in a single request; failed rows
+    stay queued. Returns how many were saved.
+    """
+    pending = st.session_state.get("pending_results", {})
+    keys = [k for k, row in pending.items() if pod is None or row["pod"] == pod]
+    if not keys:
+        return 0
+    now = datetime.utcnow().isoformat()
+    rows = [{**pending[k], "created_at": now} for k in keys]
+
+    saved, failures = write_match_rows(rows)
+    for row in saved:
+        snapshot.record_match_row(row)
+        pending.pop(result_key(row["pod"], row["player1"], row["player2"]), None)
+    if saved:
+        st.success(f"✅ Saved {len(saved)} result(s).")
+    for row, error in failures:
+        st.error(f"❌ Could not save {row['player1']} vs {row['player2']}: {error}")
+    if failures:
+        # Wait another debounce window before retrying automatically
+        st.session_state.pending_changed_at = time.time()
+    return len(saved)
+
+
+# Runs on its own timer, so idle edits are saved without waiting for a rerun
+@st.fragment(run_every=WRITE_BEHIND_CHECK_SECONDS)
+def autosave_pending_results():
+    if (st.session_state.get("pending_results")
+            and time.time() - st.session_state.get("pending_changed_at", 0) > WRITE_BEHIND_DEBOUNCE):
+        if flush_pending_results():
+            st.rerun()  # redraw the pods and standings with the saved results
+
+
 #--- Simulate Matches ----
 
 def simulate_matches(players, pod_name, source="", editable=False):
@@ -717,6 +665,7 @@ def simulate_matches(players, pod_name, source="", editable=False):
             h1 = f"{p1['handicap']:.1f}" if p1['handicap'] else "N/A"
             h2 = f"{p2['handicap']:.1f}" if p2['handicap'] else "N/A"
             st.write(f"Match: {p1['name']} ({h1}) vs {p2['name']} ({h2})")
+            st.caption(format_odds(odds_table.lookup(p1['name'], p2['name']), p1['name'], p2['name']))
 
             if editable:
                 entered = st.checkbox("Enter result for this match", key=entry_key)
@@ -753,7 +702,7 @@ def simulate_matches(players, pod_name, source="", editable=False):
                     "margin": margin
                 }
 
-                save_match_result(pod_name, p1['name'], p2['name'], winner, result_str)
+                queue_match_result(pod_name, p1['name'], p2['name'], winner, margin)
 
                 if winner == p1['name']:
                     results[p1['name']]['points'] += 1
@@ -769,6 +718,14 @@ def simulate_matches(players, pod_name, source="", editable=False):
             else:
                 st.info("🔒 Only admin can enter match results.")
 
+    if editable:
+        # The save runs as a callback, before this run counts what is still unsaved
+        pending = [row for row in st.session_state.get("pending_results", {}).values() if row["pod"] == pod_name]
+        st.button(f"💾 Save {pod_name} ({len(pending)} unsaved)", key=sanitize_key(f"{source}_{pod_name}_save"),
+                  disabled=not pending, on_click=flush_pending_results, args=(pod_name,))
+        if pending:
+            st.caption("✏️ Unsaved changes in this pod.")
+
     for player in players:
         player.update(results[player['name']])
 
@@ -778,38 +735,10 @@ def simulate_matches(players, pod_name, source="", editable=False):
 # --- Load all match results from Supabase ---
 def load_match_results():
     try:
-        # Fetch match results directly from Supabase, ordered by created_at (most recent first)
-        response = supabase.table("tournament_matches").select("*").order("created_at", desc=True).execute()
-
-        # Check if the response contains data
-        if not response.data:
+        # Latest result per match pair, indexed once per run by the snapshot
+        latest_match_results = snapshot.group_results()
+        if not latest_match_results:
             st.warning("📭 No match results found in the Supabase response.")
-            return {}
-
-        # Dictionary to group match results by match pair
-        match_dict = defaultdict(list)
-
-        # Group the match results by match pair
-        for result in response.data:
-            match_key = f"{result['pod']}|{result['player1']} vs {result['player2']}"
-            match_dict[match_key].append(result)
-
-        # Dictionary to store the most recent result for each match pair
-        latest_match_results = {}
-
-        # Iterate through each match pair and select the most recent result
-        for match_key, match_results in match_dict.items():
-            # Sort the match results by created_at (timestamp), most recent first
-            match_results.sort(key=lambda x: x['created_at'], reverse=True)
-
-            # Pick the latest result (first entry after sorting by timestamp)
-            latest_result = match_results[0]
-            latest_match_results[match_key] = {
-                "winner": latest_result["winner"],
-                "margin": latest_result["margin"]
-            }
-
-        # Return the dictionary with the most recent match results
         return latest_match_results
 
     except Exception as e:
@@ -822,8 +751,7 @@ def load_match_results():
 # --- Load all predictions from Supabase ---
 def load_predictions_from_supabase():
     try:
-        response = supabase.table("predictions").select("*").order("timestamp", desc=True).execute()
-        return response.data
+        return snapshot.rows("predictions")
     except Exception as e:
         st.error("❌ Failed to load predictions from Supabase")
         st.code(str(e))
@@ -854,22 +782,26 @@ RESULTS_FILE = "match_results.json"
 def label(player):
     return f"{player['name']} ({player['handicap']})"
 
-# --- Update the bracket progression ---
-def update_bracket_progression(round_key, winners):
+# --- Insert a row carrying the compact bracket state ---
+def insert_bracket_record(table, record):
+    """
+    Insert into bracket_progression/final_results. Until sql/bracket_state.sql
+    is applied there is no state column, so retry with the legacy columns only;
+    readers fall back to those.
+    """
     try:
-        # Update the bracket progression in Supabase
-        response = supabase.table("bracket_progression").update({round_key: json.dumps([w["name"] for w in winners])}).execute()
-        if response.status_code == 200:
-            st.success("✅ Bracket progression updated successfully.")
-        else:
-            st.error(f"❌ Error updating bracket progression: {response.status_code} - {response.error_message}")
+        return supabase.table(table).insert(record).execute()
     except Exception as e:
-        st.error(f"❌ Error updating bracket progression: {str(e)}")
+        if "state" not in record or not missing_column(e, "state"):
+            raise
+        legacy = {column: value for column, value in record.items() if column != "state"}
+        return supabase.table(table).insert(legacy).execute()
 
 def save_final_results_to_supabase(final_data):
     try:
-        response = supabase.table("final_results").insert(final_data).execute()
+        response = insert_bracket_record("final_results", final_data)
         if response.data:
+            snapshot.record_row("final_results", response.data[0])
             st.success("✅ Final results saved to Supabase.")
         else:
             st.error("❌ Failed to save final results.")
@@ -883,92 +815,45 @@ margin_lookup = {
     "5 and 4": 9, "6 and 5": 11, "7 and 6": 13, "8 and 7": 15, "9 and 8": 17
 }
 
-# Correct Pod assignments from PDF
-pods = {
-    "Pod 1": [
-        {"name": "Wade Bowlin", "handicap": 5.4},
-        {"name": "Chip Nemesi", "handicap": 8.2},
-        {"name": "Anand Saranathan", "handicap": None},
-        {"name": "Tim Coyne", "handicap": 14.0},
-    ],
-    "Pod 2": [
-        {"name": "Tim Stubenrouch", "handicap": 6.8},
-        {"name": "David Gornet", "handicap": 12.4},
-        {"name": "Ken Wood", "handicap": 21.3},
-        {"name": "William Dicks", "handicap": 20.3},
-    ],
-    "Pod 3": [
-        {"name": "Austen Flatt", "handicap": 5.5},
-        {"name": "Robert Polk", "handicap": 11.8},
-        {"name": "Pravin Patel", "handicap": 16.5},
-        {"name": "Benjamin Dickinson", "handicap": 16.3},
-    ],
-    "Pod 4": [
-        {"name": "Anup Aggrawal", "handicap": 11.4},
-        {"name": "Pratish Lad", "handicap": 11.5},
-        {"name": "Kevin Sutton", "handicap": 12.5},
-        {"name": "Raj Patel", "handicap": 11.8},
-    ],
-    "Pod 5": [
-        {"name": "Russell Clingman", "handicap": 12.7},
-        {"name": "Tom Duffy", "handicap": 15.7},
-        {"name": "Charles Ferdin", "handicap": 25.2},
-        {"name": "Danny Delgado", "handicap": 16.6},
-    ],
-    "Pod 6": [
-        {"name": "Paul Till", "handicap": 1.3},
-        {"name": "Daniel Nowak", "handicap": 9.0},
-        {"name": "Avo Mavilian", "handicap": 19.4},
-        {"name": "Jason Case", "handicap": 12.6},
-    ],
-    "Pod 7": [
-        {"name": "Keith Borgfeldt", "handicap": 9.8},
-        {"name": "Danny Rice", "handicap": 11.1},
-        {"name": "Keith Patel", "handicap": 17.7},
-        {"name": "Sanjay Lad", "handicap": 15.2},
-    ],
-    "Pod 8": [
-        {"name": "Michael Trevino", "handicap": 9.9},
-        {"name": "Brad Sinclair", "handicap": 13.0},
-        {"name": "Bill Ostrowski", "handicap": 16.0},
-        {"name": "Aldo Rodriguez", "handicap": 13.6},
-    ],
-    "Pod 9": [
-        {"name": "Rob Calvo", "handicap": 2.7},
-        {"name": "Randy Tate", "handicap": 7.1},
-        {"name": "Michael Kuznar", "handicap": 17.1},
-        {"name": "Mel Davis", "handicap": 8.5},
-    ],
-    "Pod 10": [
-        {"name": "Craig McGaughy", "handicap": 7.2},
-        {"name": "Brian Burr", "handicap": 7.3},
-        {"name": "Andy Grote", "handicap": 13.3},
-        {"name": "Larry Hawkins", "handicap": 12.5},
-    ],
-    "Pod 11": [
-        {"name": "Andrew Escamilla", "handicap": -0.8},
-        {"name": "Jay Jones", "handicap": 5.4},
-        {"name": "Kevin Sareen", "handicap": 16.6},
-        {"name": "Alexander Roman", "handicap": 5.4},
-    ],
-    "Pod 12": [
-        {"name": "Will Main", "handicap": 2.2},
-        {"name": "Todd Riddle", "handicap": 7.5},
-        {"name": "Kolbe Curtice", "handicap": 12.9},
-        {"name": "Sunil Patel", "handicap": 11.6},
-    ],
-    "Pod 13": [
-        {"name": "Tony Delgado", "handicap": 3.1},
-        {"name": "Pawan Nerusu", "handicap": 9.9},
-        {"name": "Marcus Peet", "handicap": 22.5},
-        {"name": "Ed Gifford", "handicap": 10.3},
-    ],
-}
+# Pod assignments live in tournament_data.py; copy them since simulate_matches updates the dicts
+pods = copy.deepcopy(tournament_pods)
+
+# --- Head-to-head odds (precomputed by odds_helpers.py, computed here if the artifact is missing) ---
+TOURNAMENT_COURSE = st.secrets.get("tournament", {}).get("course", "Cypress")
+
+@st.cache_resource
+def load_odds_table(course_name):
+    path = f"odds_{course_name.lower()}.npz"
+    if os.path.exists(path):
+        return OddsTable.load(path)
+    return compute_odds_matrix(flatten_players(tournament_pods), course_name)
+
+odds_table = load_odds_table(TOURNAMENT_COURSE)
+
+TOURNAMENT_SIMULATIONS = 200000
+
+# Cached on the inputs, so it re-runs automatically after every submitted result
+@st.cache_data(show_spinner="🎲 Simulating the rest of the tournament...")
+def tournament_odds(match_results, r16_pairs, bracket_winners, course_name):
+    return simulate_tournament(tournament_pods, match_results, load_odds_table(course_name),
+                               TOURNAMENT_SIMULATIONS, r16_pairs, bracket_winners, seed=0)
 
 # --- Streamlit App Auth ---
 if "match_results" not in st.session_state:
     st.session_state.match_results = load_match_results() or {}
 
+# --- Group standings ---
+# The engine is kept across reruns, so only results that changed since the last run are re-applied
+# One engine per source of results ("entered" includes the admin's unsaved
+# edits, "saved" is the stored snapshot), so each only applies its own changes
+def get_standings(match_results, source):
+    engines = st.session_state.setdefault("standings_engines", {})
+    if source not in engines:
+        engines[source] = StandingsEngine(pods)
+    standings = engines[source]
+    standings.update(match_results)
+    return standings
+
 # --- Admin Authentication (Simple Password-Based) ---
 admin_password = st.secrets["admin_password"]
 general_password = st.secrets["general_password"]
@@ -1014,20 +899,43 @@ else:
 st.sidebar.markdown("---")
 st.sidebar.markdown("🏌️‍♂️ [Golf Score Probability Calculator](https://ndddxgvdvvxzbtif33qmkr.streamlit.app)", unsafe_allow_html=True)
 
+# --- Live updates ---
+# One feed per server process polls for new result rows and merges them into the
+# shared table cache; each session only checks the feed version and reruns on change.
+FEED_POLL_SECONDS = 5
+
+@st.cache_resource
+def start_change_feed():
+    return ChangeFeed(supabase, get_table_cache(), interval=FEED_POLL_SECONDS).start()
+
+change_feed = start_change_feed()
+
+@st.fragment(run_every=FEED_POLL_SECONDS)
+def watch_for_new_results():
+    seen = st.session_state.setdefault("feed_version", change_feed.version)
+    if change_feed.version != seen:
+        st.session_state.feed_version = change_feed.version
+        st.rerun()
+    if change_feed.last_error:
+        st.caption("⚠️ Live updates paused (connection issue).")
+
+with st.sidebar:
+    watch_for_new_results()
+    if offline_sync is not None:
+        sync = offline_sync.status()
+        if sync["error"]:
+            st.caption(f"📴 Offline — {sync['pending']} result(s) waiting to sync.")
+        elif sync["pending"]:
+            st.caption(f"🔄 Syncing {sync['pending']} result(s)...")
+
 # --- Load updated bracket progression ---
 def load_bracket_progression_from_supabase():
     try:
-        res = supabase.table("bracket_progression") \
-                      .select("*") \
-                      .order("created_at", desc=True) \
-                      .limit(1).execute()
-
-        if not res.data:
+        record = snapshot.bracket_progression()
+        if not record:
             st.warning("📭 No bracket progression data found.")
             return {}
 
-        record = res.data[0]
-
         # Debug dump
         #st.write("📦 Full Raw Bracket Progression Record:", record)
 
@@ -1036,6 +944,11 @@ def load_bracket_progression_from_supabase():
         st.error(f"❌ Failed to load bracket progression: {e}")
         return {}
 
+
+# --- Bracket state: seeds from bracket_progression, winners from bracket matches ---
+def load_bracket_state():
+    return BracketState.from_record(load_bracket_progression_from_supabase(), load_bracket_winners())
+
 # --- Streamlit App Configuration ---
 tabs = st.tabs([
     "📁 Pods Overview", 
@@ -1092,6 +1005,8 @@ with tabs[1]:
     st.session_state.match_results = match_results
 
     pod_results = {}
+    # Debounced write-behind: flush everything once edits have been idle for a while
+    autosave_pending_results()
     display_match_result_log()
 
     for pod_name, players in pods.items():
@@ -1109,7 +1024,7 @@ with tabs[1]:
             st.session_state.tiebreaks_resolved = False
 
         unresolved = False
-        pod_scores = compute_pod_standings_from_results(pods, match_results)
+        pod_scores = get_standings(match_results, "entered").pod_scores()
 
         for pod_name, df in pod_scores.items():
             if df.empty or "points" not in df.columns:
@@ -1173,23 +1088,15 @@ if st.session_state.get("tiebreaks_resolved", False):
         # Save bracket to Supabase (for prediction tab, etc.)
         save_bracket_data(bracket_df)
 
-        # --- Build Round of 16 matchups ---
-        r16_left = [
-            [bracket_df.iloc[0]["name"], bracket_df.iloc[15]["name"]],
-            [bracket_df.iloc[7]["name"], bracket_df.iloc[8]["name"]],
-            [bracket_df.iloc[4]["name"], bracket_df.iloc[11]["name"]],
-            [bracket_df.iloc[3]["name"], bracket_df.iloc[12]["name"]],
-        ]
-        r16_right = [
-            [bracket_df.iloc[1]["name"], bracket_df.iloc[14]["name"]],
-            [bracket_df.iloc[6]["name"], bracket_df.iloc[9]["name"]],
-            [bracket_df.iloc[5]["name"], bracket_df.iloc[10]["name"]],
-            [bracket_df.iloc[2]["name"], bracket_df.iloc[13]["name"]],
-        ]
+        # --- Seed the bracket; R16 matchups follow from the seeds ---
+        state = BracketState(bracket_df["name"].iloc[:16])
+        r16_left = [list(pair) for _, pair in state.round_pairs("r16", "left")]
+        r16_right = [list(pair) for _, pair in state.round_pairs("r16", "right")]
 
-        # Save R16 matchups to bracket_progression
+        # Save the bracket state (plus the R16 columns older readers use) to bracket_progression
         try:
             record = {
+                "state": state.to_compact(),
                 "r16_left": json.dumps(r16_left),
                 "r16_right": json.dumps(r16_right),
                 "qf_left": json.dumps([]),
@@ -1203,9 +1110,10 @@ if st.session_state.get("tiebreaks_resolved", False):
                 "created_at": datetime.utcnow().isoformat()
             }
 
-            result = supabase.table("bracket_progression").insert(record).execute()
+            result = insert_bracket_record("bracket_progression", record)
 
             if result.data and len(result.data) > 0:
+                snapshot.record_row("bracket_progression", result.data[0])
                 bracket_id = result.data[0]["id"]
                 st.session_state.bracket_data = {**record, "id": bracket_id}
                 st.success("✅ Bracket finalized and seeded. Ready for knockout rounds!")
@@ -1226,39 +1134,15 @@ with tabs[2]:
         st.info("📭 No match results have been entered yet.")
         st.stop()
 
-    pod_results = {}
+    standings = get_standings(match_results, "saved")
 
-    for pod_name, players in pods.items():
-        updated_players = []
-        for player in players:
-            name = player['name']
-            total_points = 0
-            total_margin = 0
-
-            for match_key, result in match_results.items():
-                if match_key.startswith(f"{pod_name}|") and name in match_key:
-                    winner = result.get("winner", "")
-                    margin_val = result.get("margin", 0)
-
-                    if winner == name:
-                        total_points += 1
-                        total_margin += margin_val
-                    elif winner == "Tie":
-                        total_points += 0.5
-                    else:
-                        total_margin -= margin_val
-
-            updated_players.append({
-                "Player": name,
-                "Handicap": player["handicap"] if player["handicap"] is not None else "N/A",
-                "Points": total_points,
-                "Margin": total_margin
-            })
-
-        df = pd.DataFrame(updated_players)
+    pod_results = {}
+    for pod_name in pods:
+        df = standings.standings(pod_name)
         if not df.empty:
-            df = df.sort_values(by=["Points", "Margin"], ascending=False)
-            pod_results[pod_name] = df
+            df["handicap"] = df["handicap"].apply(lambda h: h if pd.notnull(h) else "N/A")
+            df = df.rename(columns={"name": "Player", "handicap": "Handicap", "points": "Points", "margin": "Margin"})
+            pod_results[pod_name] = df.sort_values(by=["Points", "Margin"], ascending=False)
 
     # Display
     if pod_results:
@@ -1268,17 +1152,30 @@ with tabs[2]:
     else:
         st.warning("No standings available yet.")
 
+    # --- Tournament odds ---
+    with st.expander("🔮 Tournament Odds (Monte Carlo)", expanded=False):
+        if st.checkbox("Simulate the rest of the tournament", key="show_tournament_odds"):
+            state = load_bracket_state()
+            r16_pairs = None
+            if state:
+                r16_pairs = tuple(pair for side in ("left", "right") for _, pair in state.round_pairs("r16", side))
+
+            odds_df = tournament_odds(match_results, r16_pairs,
+                                      load_bracket_winners() if r16_pairs else {}, TOURNAMENT_COURSE)
+            st.caption(f"Based on {TOURNAMENT_SIMULATIONS:,} simulated tournaments on {TOURNAMENT_COURSE}.")
+            pct_cols = ["Win Pod", "Make Bracket", "Quarterfinal", "Semifinal", "Final", "Champion"]
+            st.dataframe(odds_df.style.format({c: "{:.1%}" for c in pct_cols}, na_rep="—"),
+                         use_container_width=True)
+
 # --- Bracket Tab ---
 with tabs[3]:
     st.subheader("🏆 Bracket Stage")
-
-    def decode_if_json(raw):
-        if isinstance(raw, str):
-            try:
-                return json.loads(raw)
-            except Exception:
-                return raw
-        return raw
+    try:
+        snapshot.rows("bracket_matches")
+        if snapshot.bracket_is_stale():
+            st.warning("⚠️ Can't reach the results server; showing the last bracket results we loaded.")
+    except Exception:
+        pass  # per-match lookups below report the failure
 
     def load_or_refresh_bracket_data():
         bracket_data = st.session_state.get("bracket_data", {})
@@ -1294,24 +1191,11 @@ with tabs[3]:
 
         return st.session_state.bracket_data
 
-    def get_bracket_winner(match_id):
-        try:
-            response = supabase.table("tournament_matches") \
-                .select("winner") \
-                .eq("match_id", match_id) \
-                .limit(1) \
-                .execute()
-            if response.data and len(response.data) > 0:
-                return response.data[0]["winner"]
-            return None
-        except Exception as e:
-            st.warning(f"⚠️ Could not fetch winner for match {match_id}: {e}")
-            return None
-
     def save_final_results_to_supabase(final_data):
         try:
-            response = supabase.table("final_results").insert(final_data).execute()
+            response = insert_bracket_record("final_results", final_data)
             if response.data:
+                snapshot.record_row("final_results", response.data[0])
                 st.success("✅ Final results saved to Supabase.")
             else:
                 st.error("❌ Failed to save final results.")
@@ -1329,116 +1213,83 @@ with tabs[3]:
         st.warning("❌ Bracket data not available. Finalize in Group Stage.")
         st.stop()
 
-    r16_left = decode_if_json(bracket_data.get("r16_left"))
-    r16_right = decode_if_json(bracket_data.get("r16_right"))
-
-    icon = "🏌️"
+    state = BracketState.from_record(bracket_data, load_bracket_winners())
+    if state is None:
+        st.warning("❌ No valid bracket record found. Please finalize the bracket in the Group Stage.")
+        st.stop()
 
     if st.session_state.authenticated:
         st.success("🔐 Admin Mode Enabled")
 
-    col1, col2 = st.columns(2)
+    # Each round's matchups come from the state; a result submitted above is
+    # folded in before the next round renders
+    def render_bracket_side(side):
+        for round_key, round_name in (("r16", "Round of 16"), ("qf", "Quarterfinals"), ("sf", "Semifinal")):
+            for match_id, (p1_name, p2_name) in state.round_pairs(round_key, side):
+                render_bracket_match_ui(match_id, round_name, p1_name, p2_name)
+                state.advance(match_id, get_bracket_winner(match_id))
 
-    qf_left = []
-    qf_right = []
-    sf_left = []
-    sf_right = []
-    finalists = []
-    champion = None
+    col1, col2 = st.columns(2)
 
     with col1:
         st.markdown("### 🟦 Left Side")
-
-        for i, (p1_name, p2_name) in enumerate(r16_left):
-            render_bracket_match_ui(100 + i, "Round of 16", p1_name, p2_name)
-
-        for i in range(0, len(r16_left), 2):
-            if i + 1 < len(r16_left):
-                w1 = get_bracket_winner(100 + i)
-                w2 = get_bracket_winner(100 + i + 1)
-                if w1 and w2:
-                    render_bracket_match_ui(200 + i, "Quarterfinals", w1, w2)
-                    qf_left.append((w1, w2))
-
-        if len(qf_left) >= 2:
-            w1 = get_bracket_winner(200)
-            w2 = get_bracket_winner(202)
-            if w1 and w2:
-                render_bracket_match_ui(300, "Semifinal", w1, w2)
-                sf_left.append((w1, w2))
+        render_bracket_side("left")
 
     with col2:
         st.markdown("### 🟥 Right Side")
+        render_bracket_side("right")
 
-        for i, (p1_name, p2_name) in enumerate(r16_right):
-            render_bracket_match_ui(110 + i, "Round of 16", p1_name, p2_name)
-
-        for i in range(0, len(r16_right), 2):
-            if i + 1 < len(r16_right):
-                w1 = get_bracket_winner(110 + i)
-                w2 = get_bracket_winner(110 + i + 1)
-                if w1 and w2:
-                    render_bracket_match_ui(210 + i, "Quarterfinals", w1, w2)
-                    qf_right.append((w1, w2))
-
-        if len(qf_right) >= 2:
-            w1 = get_bracket_winner(210)
-            w2 = get_bracket_winner(212)
-            if w1 and w2:
-                render_bracket_match_ui(310, "Semifinal", w1, w2)
-                sf_right.append((w1, w2))
-
-    if len(sf_left) == 1 and len(sf_right) == 1:
-        left_finalist = get_bracket_winner(300)
-        right_finalist = get_bracket_winner(310)
-        if left_finalist and right_finalist:
-            render_bracket_match_ui(400, "Final", left_finalist, right_finalist)
-            champion = get_bracket_winner(400)
-            if champion:
-                st.success(f"🏆 Champion: **{champion}**")
-
-                if st.session_state.authenticated:
-                    if st.button("💾 Save Final Results to Leaderboard"):
-                        final_data = {
-                            "r16_left": json.dumps([p1 for p1, p2 in r16_left]),
-                            "r16_right": json.dumps([p1 for p1, p2 in r16_right]),
-                            "qf_left": json.dumps([p1 for p1, p2 in qf_left]),
-                            "qf_right": json.dumps([p1 for p1, p2 in qf_right]),
-                            "sf_left": json.dumps([p1 for p1, p2 in sf_left]),
-                            "sf_right": json.dumps([p1 for p1, p2 in sf_right]),
-                            "finalist_left": left_finalist,
-                            "finalist_right": right_finalist,
-                            "champion": champion,
-                            "created_at": datetime.utcnow().isoformat()
-                        }
-                        save_final_results_to_supabase(final_data)
+    left_finalist, right_finalist = state.finalists()
+    if left_finalist and right_finalist:
+        render_bracket_match_ui(FINAL_MATCH_ID, "Final", left_finalist, right_finalist)
+        state.advance(FINAL_MATCH_ID, get_bracket_winner(FINAL_MATCH_ID))
+        champion = state.champion()
+        if champion:
+            st.success(f"🏆 Champion: **{champion}**")
+
+            if st.session_state.authenticated:
+                if st.button("💾 Save Final Results to Leaderboard"):
+                    final_data = {
+                        **state.results_record(),
+                        "created_at": datetime.utcnow().isoformat()
+                    }
+                    save_final_results_to_supabase(final_data)
 
 
 # --- Predict Bracket ---
+# Process-wide set of who has submitted; see data_helpers.PredictionNameIndex
+@st.cache_resource
+def get_prediction_names():
+    return PredictionNameIndex(supabase)
+
+prediction_names = get_prediction_names()
+
 with tabs[4]:
     st.subheader("🔮 Predict the Bracket")
 
     now = datetime.now(timezone.utc)
     predictions_locked = now > PREDICTION_DEADLINE
 
-    bracket_data = load_bracket_progression_from_supabase()
-    r16_left = decode_if_json(bracket_data.get("r16_left"))
-    r16_right = decode_if_json(bracket_data.get("r16_right"))
-
-    if not r16_left or not r16_right or len(r16_left) < 4 or len(r16_right) < 4:
+    state = load_bracket_state()
+    if state is None:
         st.warning("Bracket is not finalized. Prediction will open once the field of 16 is set.")
         st.stop()
+    r16_left = [list(pair) for _, pair in state.round_pairs("r16", "left")]
+    r16_right = [list(pair) for _, pair in state.round_pairs("r16", "right")]
 
     full_name = st.text_input("Enter your full name to submit your bracket:", key="predictor_name").strip()
     if not full_name:
         st.info("Enter your name to proceed.")
         st.stop()
 
-    user_predictions = load_predictions_from_supabase()
-    existing_names = [p["name"].strip().lower() for p in user_predictions]
-    user_name = full_name.lower()
+    try:
+        already_submitted = prediction_names.contains(full_name)
+    except Exception as e:
+        st.error("❌ Could not check existing predictions.")
+        st.code(str(e))
+        st.stop()
 
-    if predictions_locked or user_name in existing_names:
+    if predictions_locked or already_submitted:
         st.warning("⛔ Predictions are locked or already submitted.")
         st.stop()
 
@@ -1506,85 +1357,74 @@ with tabs[4]:
                 "finalist_right": finalist_right,
                 "champion": champion
             }
-            supabase.table("predictions").insert(data).execute()
+            response = supabase.table("predictions").insert(data).execute()
+            if response.data:
+                snapshot.record_row("predictions", response.data[0])
+            else:
+                # Without the stored row (and its id) just refetch next run
+                snapshot.invalidate("predictions")
+            prediction_names.add(full_name)
             st.success("✅ Your bracket has been submitted!")
             st.rerun()
         except Exception as e:
-            st.error("❌ Failed to submit your prediction.")
-            st.code(str(e))
+            if "predictions_name_key_idx" in str(e):
+                # Unique index caught a submission from another session;
+                # our cached view of who has submitted is out of date
+                prediction_names.invalidate()
+                prediction_names.add(full_name)
+                st.warning("⛔ A prediction under this name was already submitted.")
+            else:
+                st.error("❌ Failed to submit your prediction.")
+                st.code(str(e))
 # --- Leaderboard ---
+@st.cache_resource
+def get_prediction_scorer():
+    return PredictionScorer()
+
+# Keyed on the scorer's entry revision and bracket state; the scorer itself isn't hashed
+@st.cache_data(show_spinner="🎲 Enumerating every remaining bracket outcome...")
+def prediction_pool_odds(_scorer, revision, positions, slot_names, course_name):
+    with _scorer.lock:
+        return pool_odds(_scorer, list(positions), list(slot_names), load_odds_table(course_name))
+
 with tabs[5]:
     st.subheader("🏅 Prediction Leaderboard")
 
     try:
         # Load predictions
-        predictions_response = supabase.table("predictions").select("*").execute()
-        predictions = predictions_response.data
+        predictions = snapshot.rows("predictions")
 
         # Load final results
-        final_results_response = supabase.table("final_results") \
-            .select("*") \
-            .order("created_at", desc=True) \
-            .limit(1) \
-            .execute()
-        final_results_data = final_results_response.data
+        final_results_data = snapshot.rows("final_results")
 
         if not predictions:
             st.warning("⚠️ No predictions submitted.")
             st.stop()
-        if not final_results_data:
-            st.warning("⚠️ Final results not available yet.")
-            st.stop()
-
-        # Final results parsed
-        final = final_results_data[0]
-        def parse(field): return json.loads(field) if isinstance(field, str) else field
-        def norm(name): return name.strip().lower().replace('\xa0', ' ').replace("’", "'")
-
-        actual = {
-            "r16_left": parse(final.get("r16_left", "[]")),
-            "r16_right": parse(final.get("r16_right", "[]")),
-            "qf_left": parse(final.get("qf_left", "[]")),
-            "qf_right": parse(final.get("qf_right", "[]")),
-            "sf_left": parse(final.get("sf_left", "[]")),
-            "sf_right": parse(final.get("sf_right", "[]")),
-            "champion": norm(final.get("champion", ""))
-        }
-
-        leaderboard = []
-        for row in predictions:
-            name = row.get("name", "Unknown")
-            ts = row.get("timestamp", "")[:19].replace("T", " ") + " UTC"
-
-            r16 = qf = sf = champ = 0
-
-            def score_round(pred_list, actual_list, pts):
-                return sum(pts for a, p in zip(actual_list, pred_list) if norm(a) == norm(p))
-
-            # Score per round
-            r16 += score_round(parse(row.get("r16_left", "[]")), actual["r16_left"], 1)
-            r16 += score_round(parse(row.get("r16_right", "[]")), actual["r16_right"], 1)
-            qf  += score_round(parse(row.get("qf_left", "[]")), actual["qf_left"], 3)
-            qf  += score_round(parse(row.get("qf_right", "[]")), actual["qf_right"], 3)
-            sf  += score_round(parse(row.get("sf_left", "[]")), actual["sf_left"], 5)
-            sf  += score_round(parse(row.get("sf_right", "[]")), actual["sf_right"], 5)
-            champ = 10 if norm(row.get("champion", "")) == actual["champion"] else 0
-
-            total = r16 + qf + sf + champ
-
-            leaderboard.append({
-                "Name": name,
-                "R16": r16,
-                "QF": qf,
-                "SF": sf,
-                "Champion": champ,
-                "Total": total,
-                "Submitted At": ts
-            })
-
-        df = pd.DataFrame(leaderboard)
-        df = df.sort_values(by=["Total", "Submitted At"], ascending=[False, True]).reset_index(drop=True)
-        df.insert(0, "Rank", df.index + 1)
+        # Until final results are saved, score live against the bracket matches decided so far
+        positions = None
+        if final_results_data:
+            final_row = final_results_data[0]
+            if final_row.get("state"):
+                actual_slots = BracketState.from_compact(final_row["state"]).slot_names()
+            else:
+                actual_slots = row_slots(final_row)
+        else:
+            state = load_bracket_state()
+            if state is None:
+                st.warning("⚠️ Final results not available yet.")
+                st.stop()
+            positions = state.positions()
+            actual_slots = state.slot_names()
+            decided = sum(1 for name in actual_slots if name)
+            st.info(f"📡 Live standings: {decided} of 15 bracket matches decided. "
+                    "Max Possible counts only picks still alive; eliminated entrants can't catch the leader.")
+
+        # Scored on arrays; the scorer lives across reruns and only applies added/removed entries
+        scorer = get_prediction_scorer()
+        with scorer.lock:
+            scorer.sync(predictions)
+            scorer.set_actual(actual_slots)
+            df = scorer.leaderboard(positions)
 
         def style_podium(row):
             if row["Rank"] == 1:
@@ -1600,6 +1440,14 @@ with tabs[5]:
 
         st.dataframe(styled_df, use_container_width=True)
 
+        if positions is not None and st.checkbox("🎲 Show each entrant's chance to win the pool", key="show_pool_odds"):
+            pool_df = prediction_pool_odds(scorer, scorer.revision, tuple(positions),
+                                           tuple(actual_slots), TOURNAMENT_COURSE)
+            remaining = 15 - sum(1 for name in actual_slots if name)
+            st.caption(f"Exact over all {2 ** remaining:,} remaining bracket outcomes, weighted by head-to-head odds.")
+            st.dataframe(pool_df.style.format({"Win %": "{:.1%}", "Top 3 %": "{:.1%}", "Expected Score": "{:.1f}"}),
+                         use_container_width=True)
+
     except Exception as e:
         st.error("❌ Leaderboard failed to load.")
         st.code(str(e))
@@ -0,0 +1,276 @@
+# odds_helpers.py
+# Head-to-head match play odds for every registered player.
+# Batch job: python odds_helpers.py --course Cypress --out odds_cypress.npz
+
+import argparse
+
+import numpy as np
+import pandas as pd
+
+from sim_helpers import (
+    COURSES, HOLES, allocate_strokes, hole_outcome_probabilities, matchplay_distribution, run_sharded
+)
+from tournament_data import pods
+
+# Largest margin value in the app's scale (lead + holes remaining, e.g. "3 and 2" = 5)
+MAX_MARGIN = HOLES
+
+
+def flatten_players(pods):
+    return [player for players in pods.values() for player in players]
+
+
+def compute_odds_matrix(players, course_name):
+    """
+    Exact match play odds for every ordered pair of players on one course.
+
+    Uses the handicap.py hole model and allocate_strokes, solved with the
+    Markov-chain engine. win[i, j] is the chance player i beats player j over
+    18 holes, halve[i, j] the chance they finish all square, and
+    margin_pmf[i, j, v] the chance i wins by margin value v (lead + holes
+    remaining, the same numbers margin_lookup uses). Players without a
+    handicap get NaN rows.
+    """
+    course = COURSES[course_name]
+    n = len(players)
+    win = np.full((n, n), np.nan, dtype=np.float32)
+    halve = np.full((n, n), np.nan, dtype=np.float32)
+    margin_pmf = np.zeros((n, n, MAX_MARGIN + 1), dtype=np.float32)
+
+    for i in range(n):
+        for j in range(i + 1, n):
+            hcp1, hcp2 = players[i]["handicap"], players[j]["handicap"]
+            if hcp1 is None or hcp2 is None:
+                continue
+            strokes_p1 = allocate_strokes(hcp1, hcp2, course["handicaps"])
+            strokes_p2 = allocate_strokes(hcp2, hcp1, course["handicaps"])
+            dist = matchplay_distribution(*hole_outcome_probabilities(
+                course["pars"], hcp1, hcp2, strokes_p1, strokes_p2
+            ))
+            win[i, j], win[j, i] = dist["P1 Wins"], dist["P2 Wins"]
+            halve[i, j] = halve[j, i] = dist["Ties"]
+            for (lead, holes_remaining), prob in dist["Margins"].items():
+                if lead > 0:
+                    margin_pmf[i, j, lead + holes_remaining] += prob
+                else:
+                    margin_pmf[j, i, -lead + holes_remaining] += prob
+
+    return OddsTable([p["name"] for p in players], win, halve, margin_pmf, course_name)
+
+
+class OddsTable:
+    """Array-backed head-to-head odds with O(1) lookups by player name."""
+
+    def __init__(self, names, win, halve, margin_pmf, course_name=""):
+        self.names = list(names)
+        self.index = {name: i for i, name in enumerate(self.names)}
+        self.win = win
+        self.halve = halve
+        self.margin_pmf = margin_pmf
+        self.course_name = course_name
+
+    def lookup(self, player1, player2):
+        """{'win', 'halve', 'loss'} from player1's side, or None if either player has no odds."""
+        i, j = self.index.get(player1), self.index.get(player2)
+        if i is None or j is None or np.isnan(self.win[i, j]):
+            return None
+        return {"win": float(self.win[i, j]), "halve": float(self.halve[i, j]), "loss": float(self.win[j, i])}
+
+    def save(self, path):
+        np.savez_compressed(
+            path, names=np.array(self.names), win=self.win, halve=self.halve,
+            margin_pmf=self.margin_pmf, course_name=np.array(self.course_name)
+        )
+
+    @classmethod
+    def load(cls, path):
+        with np.load(path) as data:
+            return cls(data["names"].tolist(), data["win"], data["halve"], data["margin_pmf"],
+                       str(data["course_name"]))
+
+
+# --- Whole-tournament Monte Carlo ---
+# R16 layout by seed index (0 = Seed 1), as in the Finalize Bracket step: left side then right side
+R16_SEED_PAIRS = [(0, 15), (7, 8), (4, 11), (3, 12), (1, 14), (6, 9), (5, 10), (2, 13)]
+R16_MATCH_IDS = [100, 101, 102, 103, 110, 111, 112, 113]
+QF_MATCH_IDS = [200, 202, 210, 212]
+SF_MATCH_IDS = [300, 310]
+FINAL_MATCH_ID = 400
+BEST_SECOND_PLACES = 3
+
+
+def _parse_match_key(match_key):
+    pod_name, match_str = match_key.split("|", 1)
+    player1, player2 = match_str.split(" vs ")
+    return pod_name, player1.strip(), player2.strip()
+
+
+def _neutral_odds(odds):
+    """Odds arrays with missing-handicap pairings replaced by an even match."""
+    win = np.nan_to_num(odds.win, nan=0.45)
+    halve = np.nan_to_num(odds.halve, nan=0.10)
+    margin_pmf = odds.margin_pmf.copy()
+    missing = np.isnan(odds.win)
+    mean_pmf = margin_pmf[~missing].mean(axis=0)
+    margin_pmf[missing] = mean_pmf / mean_pmf.sum() * 0.45
+    return win, halve, margin_pmf
+
+
+def _play_knockout(a, b, knockout_win, rng, forced=None):
+    """Vectorized knockout round: returns the winners (player indices) of a vs b."""
+    winners = np.where(rng.random(len(a)) < knockout_win[a, b], a, b)
+    if forced is not None:
+        winners[:] = forced
+    return winners
+
+
+def tournament_counts(pods, match_results, odds, simulations=50000, r16_pairs=None,
+                      bracket_winners=None, rng=None):
+    """
+    Play `simulations` tournaments from the results so far and count, per
+    player, how often they win their pod, make the field and reach each round.
+
+    match_results: {"Pod|P1 vs P2": {"winner", "margin"}} for group matches
+    already played; the rest are drawn from the odds table (win/halve/loss
+    plus margin). Pods are ranked on points then margin, with remaining ties
+    broken at random like the admin tiebreak pick. Seeds follow
+    build_bracket_df_from_pod_scores: pod winners in pod order, then the best
+    three second places. If the field is already set, pass r16_pairs (8 name
+    pairs, left side first) and the group stage is skipped. bracket_winners
+    ({match_id: name}) pins knockout matches that have been played.
+    """
+    rng = rng if rng is not None else np.random.default_rng()
+    bracket_winners = bracket_winners or {}
+    win, halve, margin_pmf = _neutral_odds(odds)
+    # An all-square knockout match goes to a playoff, treated as a coin flip
+    knockout_win = win + halve / 2
+    idx = odds.index
+    S = simulations
+    pod_wins = np.zeros(len(odds.names))
+
+    if r16_pairs is None:
+        decided = {}
+        for match_key, result in match_results.items():
+            pod_name, player1, player2 = _parse_match_key(match_key)
+            decided[(pod_name, frozenset((player1, player2)))] = result
+
+        pod_firsts, pod_seconds, second_keys = [], [], []
+        for pod_number, (pod_name, pod_players) in enumerate(pods.items()):
+            members = np.array([idx[p["name"]] for p in pod_players])
+            points = np.zeros((S, len(members)))
+            margins = np.zeros((S, len(members)))
+            for a in range(len(members)):
+                for b in range(a + 1, len(members)):
+                    i, j = members[a], members[b]
+                    result = decided.get((pod_name, frozenset((odds.names[i], odds.names[j]))))
+                    if result is not None:
+                        margin = result.get("margin") or 0
+                        if result.get("winner") == odds.names[i]:
+                            points[:, a] += 1
+                            margins[:, a] += margin
+                            margins[:, b] -= margin
+                        elif result.get("winner") == odds.names[j]:
+                            points[:, b] += 1
+                            margins[:, b] += margin
+                            margins[:, a] -= margin
+                        else:
+                            points[:, a] += 0.5
+                            points[:, b] += 0.5
+                        continue
+
+                    u = rng.random(S)
+                    i_wins = u < win[i, j]
+                    j_wins = u >= win[i, j] + halve[i, j]
+                    halved = ~(i_wins | j_wins)
+                    # Margin drawn from the winner's conditional margin distribution
+                    margin = np.zeros(S)
+                    for winner, loser, mask in ((i, j, i_wins), (j, i, j_wins)):
+                        cdf = np.cumsum(margin_pmf[winner, loser])
+                        draws = rng.random(np.count_nonzero(mask)) * cdf[-1]
+                        margin[mask] = np.minimum(np.searchsorted(cdf, draws, side="right"), MAX_MARGIN)
+                    points[:, a] += i_wins + 0.5 * halved
+                    points[:, b] += j_wins + 0.5 * halved
+                    margins[:, a] += margin * np.where(i_wins, 1, -1)
+                    margins[:, b] += margin * np.where(j_wins, 1, -1)
+
+            # Points first, then margin, then a random tiebreak
+            order = np.argsort(-(points * 1000 + margins + rng.random(points.shape) * 0.5), axis=1)
+            rows = np.arange(S)
+            pod_firsts.append(members[order[:, 0]])
+            pod_seconds.append(members[order[:, 1]])
+            second_keys.append(points[rows, order[:, 1]] * 1000 + margins[rows, order[:, 1]]
+                               - pod_number * 1e-3)
+            pod_wins += np.bincount(members[order[:, 0]], minlength=len(odds.names))
+
+        seconds = np.stack(pod_seconds, axis=1)
+        best_seconds = np.argsort(-np.stack(second_keys, axis=1), axis=1, kind="stable")[:, :BEST_SECOND_PLACES]
+        seeds = np.concatenate([np.stack(pod_firsts, axis=1),
+                                np.take_along_axis(seconds, best_seconds, axis=1)], axis=1)
+        r16 = [(seeds[:, a], seeds[:, b]) for a, b in R16_SEED_PAIRS]
+    else:
+        r16 = [(np.full(S, idx[p1]), np.full(S, idx[p2])) for p1, p2 in r16_pairs]
+        seeds = np.concatenate([np.stack(pair, axis=1) for pair in r16], axis=1)
+
+    def forced(match_id):
+        name = bracket_winners.get(match_id) if r16_pairs is not None else None
+        return idx[name] if name in idx else None
+
+    qf = [_play_knockout(a, b, knockout_win, rng, forced(mid)) for (a, b), mid in zip(r16, R16_MATCH_IDS)]
+    sf = [_play_knockout(qf[k], qf[k + 1], knockout_win, rng, forced(mid))
+          for k, mid in zip(range(0, 8, 2), QF_MATCH_IDS)]
+    final = [_play_knockout(sf[k], sf[k + 1], knockout_win, rng, forced(mid))
+             for k, mid in zip(range(0, 4, 2), SF_MATCH_IDS)]
+    champion = _play_knockout(final[0], final[1], knockout_win, rng, forced(FINAL_MATCH_ID))
+
+    def count(*arrays):
+        return np.bincount(np.concatenate([np.ravel(a) for a in arrays]), minlength=len(odds.names))
+
+    return {
+        "Win Pod": pod_wins,
+        "Make Bracket": count(seeds),
+        "Quarterfinal": count(*qf),
+        "Semifinal": count(*sf),
+        "Final": count(*final),
+        "Champion": count(champion),
+        "Simulations": S,
+    }
+
+
+def simulate_tournament(pods, match_results, odds, simulations=200000, r16_pairs=None,
+                        bracket_winners=None, seed=None, workers=None):
+    """
+    Monte Carlo the rest of the tournament, sharded across the process pool.
+
+    Returns a DataFrame with each player's probability of winning their pod,
+    making the field of 16, and reaching each knockout round.
+    """
+    counts = run_sharded(tournament_counts, simulations, seed, workers, pods=pods, match_results=match_results,
+                         odds=odds, r16_pairs=r16_pairs, bracket_winners=bracket_winners)
+    total = counts.pop("Simulations")
+    columns = {column: values / total for column, values in counts.items()}
+    if r16_pairs is not None:
+        columns["Win Pod"] = np.full(len(odds.names), np.nan)
+
+    pod_of = {p["name"]: pod_name for pod_name, pod_players in pods.items() for p in pod_players}
+    df = pd.DataFrame({"Player": odds.names, "Pod": [pod_of.get(n, "") for n in odds.names], **columns})
+    df = df[df["Player"].isin(pod_of)]
+    return df.sort_values(by=["Champion", "Make Bracket"], ascending=False).reset_index(drop=True)
+
+
+def format_odds(odds, player1, player2):
+    if odds is None:
+        return "Odds unavailable (missing handicap)"
+    return (f"📈 {player1} {odds['win']:.0%} · Halved {odds['halve']:.0%} · "
+            f"{player2} {odds['loss']:.0%}")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Precompute head-to-head match play odds.")
+    parser.add_argument("--course", default="Cypress", choices=sorted(COURSES))
+    parser.add_argument("--out", default=None, help="Output .npz path (default odds_<course>.npz)")
+    args = parser.parse_args()
+
+    table = compute_odds_matrix(flatten_players(pods), args.course)
+    out = args.out or f"odds_{args.course.lower()}.npz"
+    table.save(out)
+    print(f"Saved {len(table.names)}x{len(table.names)} odds matrix for {args.course} to {out}")
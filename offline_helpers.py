@@ -0,0 +1,284 @@
+# offline_helpers.py
+# Offline-first mirror of the tournament tables for course-side scoring.
+# Reads and writes go to a local SQLite file and return immediately; a
+# background SyncWorker pushes local edits to Supabase and pulls remote ones
+# whenever the connection is up. Every row carries a version stamp and the
+# higher stamp wins on both sides (last-writer-wins).
+
+import json
+import os
+import sqlite3
+import threading
+import time
+from datetime import datetime, timedelta, timezone
+
+from data_helpers import stamp_time, upsert_match_rows
+
+DEFAULT_STORE_PATH = os.environ.get("OFFLINE_STORE_PATH", ".tournament_local.sqlite")
+
+
+def tournament_row_key(row):
+    if row.get("match_id") is not None:
+        return f"match:{row['match_id']}"
+    return f"pair:{row['pod']}|{row['player1']} vs {row['player2']}"
+
+
+def id_row_key(row):
+    return f"id:{row['id']}"
+
+
+# table -> (row key, version column, pull column, writable locally)
+# The version column decides last-writer-wins and is stamped at edit time.
+# The pull column is what incremental pulls page on. For the tables with
+# sql/feed_synced_at.sql that's the server-assigned synced_at, so a replayed
+# offline edit (old version, old created_at) is still new to every other device.
+MIRRORED_TABLES = {
+    "tournament_matches": (tournament_row_key, "version", "synced_at", True),
+    "bracket_progression": (id_row_key, "created_at", "synced_at", False),
+    "bracket_data": (id_row_key, "timestamp", "timestamp", False),
+    "predictions": (id_row_key, "timestamp", "timestamp", False),
+    "final_results": (id_row_key, "created_at", "created_at", False),
+}
+
+# Pulls re-read this far behind the last mark; server stamps come from
+# transaction clocks, so a row can commit after a newer-stamped one.
+# Re-merging a row is a no-op.
+PULL_OVERLAP = timedelta(seconds=2)
+
+
+def _pull_since(mark):
+    return None if mark is None else (stamp_time(mark) - PULL_OVERLAP).isoformat()
+
+
+def new_version():
+    """Version stamp for a local write: wall-clock seconds, comparable across devices."""
+    return time.time()
+
+
+class LocalStore:
+    """SQLite mirror: one row per (table, key) with its version and a dirty flag."""
+
+    def __init__(self, path=DEFAULT_STORE_PATH):
+        self._lock = threading.Lock()
+        self._db = sqlite3.connect(path, check_same_thread=False)
+        self._db.executescript(
+            "CREATE TABLE IF NOT EXISTS mirror ("
+            " tbl TEXT NOT NULL, row_key TEXT NOT NULL, data TEXT NOT NULL,"
+            " version TEXT NOT NULL, dirty INTEGER NOT NULL DEFAULT 0,"
+            " PRIMARY KEY (tbl, row_key));"
+            "CREATE TABLE IF NOT EXISTS sync_marks (tbl TEXT PRIMARY KEY, pulled_through TEXT);"
+        )
+        self._db.commit()
+
+    def read(self, table):
+        """All rows of a table, newest version first."""
+        with self._lock:
+            rows = self._db.execute(
+                "SELECT data FROM mirror WHERE tbl = ? ORDER BY version DESC", (table,)
+            ).fetchall()
+        return [json.loads(data) for (data,) in rows]
+
+    def write(self, table, row):
+        """Local write: stamped with a new version and queued for push."""
+        key_fn, version_col, _, writable = MIRRORED_TABLES[table]
+        if not writable:
+            raise ValueError(f"{table} is read-only in the local store")
+        row = {**row, version_col: new_version()}
+        with self._lock:
+            self._db.execute(
+                "INSERT OR REPLACE INTO mirror (tbl, row_key, data, version, dirty) VALUES (?, ?, ?, ?, 1)",
+                (table, key_fn(row), json.dumps(row), _version_text(row[version_col]))
+            )
+            self._db.commit()
+        return row
+
+    def merge_remote(self, table, rows):
+        """Apply pulled rows; a remote row replaces the local one only if its version is newer."""
+        key_fn, version_col, _, _ = MIRRORED_TABLES[table]
+        applied = 0
+        with self._lock:
+            for row in rows:
+                key = key_fn(row)
+                version = _version_text(row.get(version_col))
+                local = self._db.execute(
+                    "SELECT version FROM mirror WHERE tbl = ? AND row_key = ?", (table, key)
+                ).fetchone()
+                if local is not None and local[0] >= version:
+                    continue
+                self._db.execute(
+                    "INSERT OR REPLACE INTO mirror (tbl, row_key, data, version, dirty) VALUES (?, ?, ?, ?, 0)",
+                    (table, key, json.dumps(row), version)
+                )
+                applied += 1
+            self._db.commit()
+        return applied
+
+    def dirty_rows(self, table):
+        with self._lock:
+            rows = self._db.execute(
+                "SELECT data FROM mirror WHERE tbl = ? AND dirty = 1 ORDER BY version", (table,)
+            ).fetchall()
+        return [json.loads(data) for (data,) in rows]
+
+    def mark_clean(self, table, rows):
+        key_fn, version_col, _, _ = MIRRORED_TABLES[table]
+        with self._lock:
+            for row in rows:
+                # Only if no newer local edit landed while the push was in flight
+                self._db.execute(
+                    "UPDATE mirror SET dirty = 0 WHERE tbl = ? AND row_key = ? AND version = ?",
+                    (table, key_fn(row), _version_text(row[version_col]))
+                )
+            self._db.commit()
+
+    def pending_count(self):
+        with self._lock:
+            return self._db.execute("SELECT COUNT(*) FROM mirror WHERE dirty = 1").fetchone()[0]
+
+    def pulled_through(self, table):
+        with self._lock:
+            row = self._db.execute("SELECT pulled_through FROM sync_marks WHERE tbl = ?", (table,)).fetchone()
+        return row[0] if row else None
+
+    def set_pulled_through(self, table, mark):
+        with self._lock:
+            self._db.execute("INSERT OR REPLACE INTO sync_marks (tbl, pulled_through) VALUES (?, ?)", (table, mark))
+            self._db.commit()
+
+
+def _version_text(version):
+    # Numeric stamps are zero-padded so text order matches numeric order;
+    # timestamp strings (ISO) already sort correctly as text.
+    if isinstance(version, (int, float)):
+        return f"{version:020.6f}"
+    return str(version or "")
+
+
+# --- Backends ---
+class SupabaseBackend:
+    """Remote side of the sync, on the supabase client."""
+
+    def __init__(self, supabase):
+        self.supabase = supabase
+
+    def pull(self, table, pull_col, since):
+        query = self.supabase.table(table).select("*")
+        if since is not None:
+            query = query.gt(pull_col, since)
+        return query.order(pull_col).execute().data or []
+
+    def push(self, table, rows):
+        """
+        Upsert local edits; returns the rows the server stored. Group rows go
+        through upsert_match_rows (with its fallback for a database without the
+        pair key); rows it couldn't save aren't returned and stay queued.
+        """
+        saved = []
+        group = [row for row in rows if row.get("match_id") is None]
+        bracket = [row for row in rows if row.get("match_id") is not None]
+        if group:
+            saved += upsert_match_rows(self.supabase, group)[0]
+        if bracket:
+            saved += self.supabase.table(table).upsert(bracket, on_conflict="match_id").execute().data or []
+        return saved
+
+
+class MemoryBackend:
+    """
+    In-process stand-in for Supabase with the same last-writer-wins rule and
+    synced_at stamping the server triggers apply, for running the sync
+    without a network.
+    """
+
+    def __init__(self):
+        self.tables = {table: {} for table in MIRRORED_TABLES}
+        self.online = True
+        self._clock = datetime(2000, 1, 1, tzinfo=timezone.utc)
+
+    def _check(self):
+        if not self.online:
+            raise ConnectionError("backend offline")
+
+    def server_stamp(self):
+        """Next server clock reading (strictly increasing), like clock_timestamp()."""
+        self._clock += timedelta(milliseconds=1)
+        return self._clock.isoformat()
+
+    def pull(self, table, pull_col, since):
+        self._check()
+        rows = [row for row in self.tables[table].values()
+                if since is None or _version_text(row.get(pull_col)) > _version_text(since)]
+        return sorted(rows, key=lambda row: _version_text(row.get(pull_col)))
+
+    def push(self, table, rows):
+        self._check()
+        key_fn, version_col, pull_col, _ = MIRRORED_TABLES[table]
+        saved = []
+        for row in rows:
+            current = self.tables[table].get(key_fn(row))
+            if current is None or _version_text(current[version_col]) <= _version_text(row[version_col]):
+                current = {**row, pull_col: self.server_stamp()}
+            else:
+                current = {**current, pull_col: self.server_stamp()}  # server kept the newer row
+            self.tables[table][key_fn(row)] = current
+            saved.append(dict(current))
+        return saved
+
+
+# --- Background sync ---
+class SyncWorker:
+    """Pull-then-push loop; failures just leave rows dirty for the next pass."""
+
+    def __init__(self, store, backend, interval=10):
+        self.store = store
+        self.backend = backend
+        self.interval = interval
+        self.last_sync = None
+        self.last_error = None
+        self._thread = None
+        self._stop = threading.Event()
+        self._sync_lock = threading.Lock()
+
+    def sync_once(self):
+        with self._sync_lock:
+            for table, (_, _, pull_col, writable) in MIRRORED_TABLES.items():
+                mark = self.store.pulled_through(table)
+                rows = self.backend.pull(table, pull_col, _pull_since(mark))
+                self.store.merge_remote(table, rows)
+                stamps = [row[pull_col] for row in rows if row.get(pull_col)]
+                if stamps:
+                    self.store.set_pulled_through(table, max(stamps + ([mark] if mark else []), key=stamp_time))
+                if writable:
+                    dirty = self.store.dirty_rows(table)
+                    if dirty:
+                        saved = self.backend.push(table, dirty)
+                        # Rows the server refused (it had newer) come back as the newer version
+                        self.store.merge_remote(table, saved)
+                        # Rows that didn't come back at all failed and stay queued
+                        key_fn = MIRRORED_TABLES[table][0]
+                        stored = {key_fn(row) for row in saved}
+                        self.store.mark_clean(table, [row for row in dirty if key_fn(row) in stored])
+            self.last_sync = time.time()
+            self.last_error = None
+
+    def start(self):
+        if self._thread is None or not self._thread.is_alive():
+            self._stop.clear()
+            self._thread = threading.Thread(target=self._run, name="offline-sync", daemon=True)
+            self._thread.start()
+        return self
+
+    def stop(self):
+        self._stop.set()
+
+    def _run(self):
+        while True:
+            try:
+                self.sync_once()
+            except Exception as e:
+                self.last_error = str(e)
+            if self._stop.wait(self.interval):
+                break
+
+    def status(self):
+        return {"pending": self.store.pending_count(), "last_sync": self.last_sync, "error": self.last_error}
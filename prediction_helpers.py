@@ -0,0 +1,342 @@
+# prediction_helpers.py
+# Bracket prediction scoring on arrays.
+# Every prediction becomes one row of 15 slot picks (player ids): R16 left
+# and right (4 + 4), QF left and right (2 + 2), SF left and right (1 + 1) and
+# the champion. Scores are slot-wise comparisons against the actual results
+# times a weight vector, so thousands of entries score in one numpy pass and
+# a newly decided slot only recomputes that column.
+
+import json
+import threading
+
+import numpy as np
+import pandas as pd
+
+from bracket_state import LEVEL_OFFSETS, SLOT_LEVELS, SLOT_MATCH_IDS, SUBTREE_MASK
+from data_helpers import normalize_name
+from sim_helpers import map_sharded
+
+# (field, number of slots) in slot order; the champion is the last slot
+ROUND_FIELDS = [
+    ("r16_left", 4), ("r16_right", 4),
+    ("qf_left", 2), ("qf_right", 2),
+    ("sf_left", 1), ("sf_right", 1),
+    ("champion", 1),
+]
+NUM_SLOTS = sum(size for _, size in ROUND_FIELDS)
+SLOT_WEIGHTS = np.array([1] * 8 + [3] * 4 + [5] * 2 + [10], dtype=np.int32)
+ROUND_SLICES = {"R16": slice(0, 8), "QF": slice(8, 12), "SF": slice(12, 14), "Champion": slice(14, 15)}
+
+NO_PICK = -1
+
+
+def live_slots(bracket_winners):
+    """Slot names from decided bracket matches ({match_id: winner}); None where undecided."""
+    return [bracket_winners.get(match_id) for match_id in SLOT_MATCH_IDS]
+
+
+def _parse(field):
+    return json.loads(field) if isinstance(field, str) and field.startswith("[") else field
+
+
+def row_slots(row):
+    """15 slot names (None where missing) from a predictions/final_results row."""
+    slots = []
+    for field, size in ROUND_FIELDS:
+        value = _parse(row.get(field))
+        values = value if isinstance(value, list) else [value]
+        values = (values + [None] * size)[:size]
+        slots.extend(values)
+    return slots
+
+
+class NameIndex:
+    """Interns normalized player names to small integer ids."""
+
+    def __init__(self):
+        self.ids = {}
+        self.names = []
+
+    def intern(self, name):
+        key = normalize_name(name)
+        if not key:
+            return NO_PICK
+        if key not in self.ids:
+            self.ids[key] = len(self.names)
+            self.names.append(name.strip())
+        return self.ids[key]
+
+    def encode(self, names):
+        return np.array([self.intern(name) for name in names], dtype=np.int32)
+
+
+class PredictionScorer:
+    """
+    Pick matrix (entries x 15) plus the actual-results vector.
+    sync() and set_actual() are incremental: new entries score only their row,
+    changed slots rescore only their column. Entries are keyed on the row id;
+    revision changes whenever the set of entries does.
+    """
+
+    def __init__(self, predictions=(), names=None):
+        self.names = names or NameIndex()
+        self.lock = threading.Lock()  # held by callers sharing one scorer across sessions
+        self.entries = []          # (name, timestamp, id)
+        self._keys = set()
+        self.revision = 0
+        self.picks = np.empty((0, NUM_SLOTS), dtype=np.int32)
+        self.actual = np.full(NUM_SLOTS, NO_PICK, dtype=np.int32)
+        self.points = np.empty((0, NUM_SLOTS), dtype=np.int32)
+        self.sync(predictions)
+
+    def sync(self, predictions):
+        """
+        Match the entries to the stored rows: add rows not seen yet, drop entries
+        whose row is gone. Rows without an id (not stored yet) are skipped.
+        Returns (added, removed).
+        """
+        stored = {row["id"]: row for row in predictions if row.get("id") is not None}
+        keep = np.array([key in stored for _, _, key in self.entries], dtype=bool)
+        removed = int((~keep).sum())
+        if removed:
+            self.picks, self.points = self.picks[keep], self.points[keep]
+            self.entries = [entry for entry, kept in zip(self.entries, keep) if kept]
+            self._keys = {key for _, _, key in self.entries}
+        new = [row for key, row in stored.items() if key not in self._keys]
+        if new:
+            picks = np.stack([self.names.encode(row_slots(row)) for row in new])
+            self.picks = np.vstack([self.picks, picks])
+            self.points = np.vstack([self.points, self._score(picks)])
+            for row in new:
+                self._keys.add(row["id"])
+                self.entries.append((row.get("name", "Unknown"), row.get("timestamp") or "", row["id"]))
+        if new or removed:
+            self.revision += 1
+        return len(new), removed
+
+    def _score(self, picks, slots=slice(None)):
+        actual = self.actual[slots]
+        return ((picks == actual) & (actual != NO_PICK)) * SLOT_WEIGHTS[slots]
+
+    def set_actual(self, slot_names):
+        """Update the actual result per slot (None = undecided); only changed slots are rescored."""
+        actual = self.names.encode(slot_names)
+        changed = np.flatnonzero(actual != self.actual)
+        if changed.size:
+            self.actual[changed] = actual[changed]
+            self.points[:, changed] = self._score(self.picks[:, changed], changed)
+        return changed
+
+    def round_scores(self):
+        return {label: self.points[:, cols].sum(axis=1) for label, cols in ROUND_SLICES.items()}
+
+    def totals(self):
+        return self.points.sum(axis=1)
+
+    def max_possible(self, positions):
+        """
+        Current points plus every undecided slot whose pick can still get there.
+        positions are the 16 R16 names in bracket order. A pick is live for a
+        slot if the player sits in that slot's subtree and hasn't lost a decided
+        match; both checks are lookups into SUBTREE_MASK, so the cost doesn't
+        depend on how many scenarios remain.
+        """
+        position_ids = self.names.encode(positions)
+        pos_of_id = np.full(len(self.names.names) + 1, NO_PICK, dtype=np.int32)
+        pos_of_id[position_ids[position_ids != NO_PICK]] = np.flatnonzero(position_ids != NO_PICK)
+
+        decided = self.actual != NO_PICK
+        winner_pos = np.where(decided, pos_of_id[self.actual], NO_PICK)
+        # A player is out once a decided slot above them went to someone else
+        lost = SUBTREE_MASK & decided[:, None] & (winner_pos[:, None] != np.arange(16))
+        alive = ~lost.any(axis=0)
+
+        pick_pos = np.where(self.picks != NO_PICK, pos_of_id[self.picks], NO_PICK)
+        known = pick_pos != NO_PICK
+        safe_pos = np.where(known, pick_pos, 0)
+        live = (known & ~decided & alive[safe_pos]
+                & SUBTREE_MASK[np.arange(NUM_SLOTS), safe_pos])
+        return self.totals() + (live * SLOT_WEIGHTS).sum(axis=1)
+
+    def leaderboard(self, positions=None):
+        """
+        Name, R16, QF, SF, Champion, Total, Submitted At, ranked by total then
+        submission time. With positions (live mode) also Max Possible and
+        Eliminated: can no longer reach the current leader's score.
+        """
+        df = pd.DataFrame({"Name": [name for name, _, _ in self.entries], **self.round_scores()})
+        df["Total"] = self.totals()
+        if positions is not None:
+            df["Max Possible"] = self.max_possible(positions)
+            df["Eliminated"] = df["Max Possible"] < df["Total"].max()
+        df["Submitted At"] = [ts[:19].replace("T", " ") + " UTC" for _, ts, _ in self.entries]
+        df = df.sort_values(by=["Total", "Submitted At"], ascending=[False, True]).reset_index(drop=True)
+        df.insert(0, "Rank", df.index + 1)
+        return df
+
+
+# --- Exhaustive outcome enumeration ---
+# An outcome is 15 bits, one per slot: 0 if the slot goes to the winner of its
+# first feeder (the first player of an R16 pair), 1 for the second. That's
+# 2^15 = 32,768 brackets at most; decided slots are fixed bits, so only the
+# remaining 2^k are enumerated.
+OUTCOME_BLOCK = 4096
+
+
+def _path_condition(position, slot):
+    """(mask, value) over outcome bits under which R16 position wins through to slot."""
+    if position == NO_PICK or not SUBTREE_MASK[slot, position]:
+        return 0, 1  # can never hold
+    mask = value = 0
+    for level in range(SLOT_LEVELS[slot] + 1):
+        bit = LEVEL_OFFSETS[level] + (position >> (level + 1))
+        mask |= 1 << bit
+        value |= ((position >> level) & 1) << bit
+    return mask, value
+
+
+def pick_conditions(pick_positions):
+    """Bit-packed (mask, value) arrays, entries x 15, for picks given as R16 positions."""
+    masks = np.zeros(pick_positions.shape, dtype=np.int64)
+    values = np.zeros(pick_positions.shape, dtype=np.int64)
+    for index, position in np.ndenumerate(pick_positions):
+        masks[index], values[index] = _path_condition(int(position), index[1])
+    return masks, values
+
+
+def fixed_outcome_bits(slot_positions):
+    """(mask, value) of outcome bits already settled by decided slots (positions, NO_PICK = undecided)."""
+    mask = value = 0
+    for slot, position in enumerate(slot_positions):
+        if position == NO_PICK:
+            continue
+        if not SUBTREE_MASK[slot, position]:
+            raise ValueError(f"Winner of slot {slot} isn't in that part of the bracket")
+        level = SLOT_LEVELS[slot]
+        mask |= 1 << slot
+        value |= ((position >> level) & 1) << slot
+    return mask, value
+
+
+def _slot_winners(outcomes):
+    """Winning R16 position per slot for each outcome, outcomes x 15."""
+    winners = np.empty((outcomes.size, NUM_SLOTS), dtype=np.int64)
+    for slot in range(NUM_SLOTS):
+        bit = (outcomes >> slot) & 1
+        level = SLOT_LEVELS[slot]
+        if level == 0:
+            winners[:, slot] = 2 * slot + bit
+        else:
+            first = LEVEL_OFFSETS[level - 1] + 2 * (slot - LEVEL_OFFSETS[level])
+            winners[:, slot] = np.where(bit == 0, winners[:, first], winners[:, first + 1])
+    return winners
+
+
+def _slot_losers(winners):
+    losers = np.empty_like(winners)
+    for slot in range(NUM_SLOTS):
+        level = SLOT_LEVELS[slot]
+        if level == 0:
+            losers[:, slot] = winners[:, slot] ^ 1
+        else:
+            first = LEVEL_OFFSETS[level - 1] + 2 * (slot - LEVEL_OFFSETS[level])
+            losers[:, slot] = np.where(winners[:, slot] == winners[:, first],
+                                       winners[:, first + 1], winners[:, first])
+    return losers
+
+
+def distinct_conditions(masks, values):
+    """
+    Collapse per-entry pick conditions to the distinct (slot, mask, value)
+    ones (at most 16 per slot) plus an incidence matrix back to entries, so
+    scoring is one small matrix product instead of entries x slots bit tests.
+    """
+    cond_masks, cond_values, cond_weights, columns = [], [], [], []
+    for slot in range(NUM_SLOTS):
+        pairs, inverse = np.unique(np.stack([masks[:, slot], values[:, slot]], axis=1),
+                                   axis=0, return_inverse=True)
+        columns.append(len(cond_masks) + inverse.ravel())
+        cond_masks.extend(pairs[:, 0])
+        cond_values.extend(pairs[:, 1])
+        cond_weights.extend([SLOT_WEIGHTS[slot]] * len(pairs))
+    incidence = np.zeros((len(cond_masks), masks.shape[0]), dtype=np.float32)
+    for slot_columns in columns:
+        incidence[slot_columns, np.arange(masks.shape[0])] = 1
+    return (np.array(cond_masks, dtype=np.int64), np.array(cond_values, dtype=np.int64),
+            np.array(cond_weights, dtype=np.float32), incidence)
+
+
+def score_outcome_block(start, stop, free_bits, fixed_value, undecided, pair_prob,
+                        cond_masks, cond_values, cond_weights, incidence):
+    """
+    Probability-weighted finishing counts for outcomes start..stop-1 of the
+    free-bit enumeration. Module level so map_sharded can ship it to workers.
+    """
+    index = np.arange(start, stop, dtype=np.int64)
+    outcomes = np.full(index.size, fixed_value, dtype=np.int64)
+    for j, bit in enumerate(free_bits):
+        outcomes |= ((index >> j) & 1) << bit
+
+    winners = _slot_winners(outcomes)
+    losers = _slot_losers(winners)
+    prob = np.prod(np.where(undecided, pair_prob[winners, losers], 1.0), axis=1)
+
+    # Points are small integers, so the float32 product is exact
+    hits = ((outcomes[:, None] & cond_masks) == cond_values) * cond_weights
+    scores = hits.astype(np.float32) @ incidence
+
+    top = scores.max(axis=1, keepdims=True)
+    is_top = scores == top
+    win = ((prob / is_top.sum(axis=1))[:, None] * is_top).sum(axis=0)
+    if scores.shape[1] > 3:
+        third = -np.partition(-scores, 2, axis=1)[:, 2:3]
+        top3 = (prob[:, None] * (scores >= third)).sum(axis=0)
+    else:
+        top3 = np.full(scores.shape[1], prob.sum())
+    return {"Win": win, "Top 3": top3, "Expected": prob @ scores, "Total": prob.sum()}
+
+
+def pairwise_win_matrix(positions, odds):
+    """16 x 16 chance that position a beats b (win + half the halves); 0.5 without odds."""
+    matrix = np.full((16, 16), 0.5)
+    for a, b in np.ndindex(16, 16):
+        match = odds.lookup(positions[a], positions[b]) if odds is not None and a != b else None
+        if match:
+            matrix[a, b] = match["win"] + match["halve"] / 2
+    return matrix
+
+
+def pool_odds(scorer, positions, slot_names, odds, workers=None, block_size=OUTCOME_BLOCK):
+    """
+    Every entrant's chance of finishing first (ties split), in the top 3
+    (competition ranking) and expected final score, over all remaining
+    bracket outcomes weighted by head-to-head odds.
+    """
+    position_ids = scorer.names.encode(positions)
+    pos_of_id = np.full(len(scorer.names.names) + 1, NO_PICK, dtype=np.int64)
+    pos_of_id[position_ids[position_ids != NO_PICK]] = np.flatnonzero(position_ids != NO_PICK)
+    pick_positions = np.where(scorer.picks != NO_PICK, pos_of_id[scorer.picks], NO_PICK)
+    cond_masks, cond_values, cond_weights, incidence = distinct_conditions(*pick_conditions(pick_positions))
+
+    slot_ids = scorer.names.encode(slot_names)
+    slot_positions = np.where(slot_ids != NO_PICK, pos_of_id[slot_ids], NO_PICK)
+    fixed_mask, fixed_value = fixed_outcome_bits(slot_positions)
+    free_bits = [slot for slot in range(NUM_SLOTS) if not fixed_mask >> slot & 1]
+    undecided = np.array([not fixed_mask >> slot & 1 for slot in range(NUM_SLOTS)])
+
+    shared = {"free_bits": free_bits, "fixed_value": fixed_value, "undecided": undecided,
+              "pair_prob": pairwise_win_matrix(positions, odds), "cond_masks": cond_masks,
+              "cond_values": cond_values, "cond_weights": cond_weights, "incidence": incidence}
+    total = 1 << len(free_bits)
+    tasks = [{"start": start, "stop": min(start + block_size, total), **shared}
+             for start in range(0, total, block_size)]
+    counts = map_sharded(score_outcome_block, tasks, workers=workers)
+
+    df = pd.DataFrame({
+        "Name": [name for name, _, _ in scorer.entries],
+        "Win %": counts["Win"] / counts["Total"],
+        "Top 3 %": counts["Top 3"] / counts["Total"],
+        "Expected Score": counts["Expected"] / counts["Total"],
+    })
+    return df.sort_values(by=["Win %", "Expected Score"], ascending=False).reset_index(drop=True)
+
@@ -0,0 +1,509 @@
+# sim_helpers.py
+# Simulation engines shared by golf_simulator.py and handicap.py.
+# numpy/scipy only, no Streamlit calls, so the functions can be imported anywhere.
+
+import multiprocessing as mp
+import os
+import threading
+import time
+import numpy as np
+from collections import Counter
+from concurrent.futures import ProcessPoolExecutor
+from functools import lru_cache
+from scipy.special import ndtr
+
+HOLES = 18
+HOLES_REMAINING = (HOLES - 1) - np.arange(HOLES)
+
+# Course data (used by handicap.py and the tournament odds jobs)
+COURSES = {
+    "Cypress": {
+        "yardages": [367, 355, 504, 164, 366, 539, 125, 387, 346, 338, 525, 398, 353, 128, 418, 163, 397, 426],
+        "handicaps": [7, 13, 11, 15, 1, 5, 17, 3, 9, 10, 12, 4, 14, 18, 2, 16, 8, 6],
+        "pars": [4, 4, 5, 3, 4, 5, 3, 4, 4, 4, 5, 4, 4, 3, 4, 3, 4, 5],
+        "slope": 130,
+        "rating": 71.3
+    },
+    "Pecan": {
+        "yardages": [349, 488, 328, 179, 420, 539, 167, 396, 437, 375, 542, 358, 137, 353, 480, 189, 424, 388],
+        "handicaps": [7, 17, 11, 15, 5, 1, 13, 9, 3, 8, 6, 14, 16, 10, 18, 12, 4, 2],
+        "pars": [4, 5, 4, 3, 4, 5, 3, 4, 4, 4, 5, 4, 3, 4, 5, 3, 4, 4],
+        "slope": 132,
+        "rating": 72.0
+    }
+}
+
+# Per-hole outcome codes in the handicap.py batch results
+HOLE_P1_WIN = 1
+HOLE_HALVED = 0
+HOLE_P2_WIN = -1
+HOLE_NOT_PLAYED = 2
+
+
+# --- Match Play (batch engine) ---
+def simulate_matchplay_batch(player1, player2, simulations=10000, rng=None):
+    """
+    Vectorized version of the golf_simulator match play loop.
+
+    Draws the full (simulations x 18) hole matrix in one go, scores every hole
+    with array operations and finds the hole where each match was closed out.
+    Returns the same dict as golf_simulator.simulate_matchplay.
+    """
+    rng = rng if rng is not None else np.random.default_rng()
+
+    # Only the sign of (p1 net - p2 net) matters per hole, so draw the difference
+    # of the two hole scores directly: one float32 normal per hole instead of two.
+    hole_diff_mean = (player1['avg'] - player2['avg']) / HOLES \
+        - (np.asarray(player1['strokes']) - np.asarray(player2['strokes']))
+    hole_diff_std = np.sqrt((player1['std'] ** 2 + player2['std'] ** 2) / HOLES)
+    threshold = (-hole_diff_mean / hole_diff_std).astype(np.float32)
+    z = rng.standard_normal((simulations, HOLES), dtype=np.float32)
+
+    # +1 when player 1 wins the hole, -1 when player 2 wins it, 0 when halved
+    hole_signs = (z < threshold).view(np.int8) - (z > threshold).view(np.int8)
+    final_scores, last_hole = play_out_matches(hole_signs)
+    return summarize_matchplay(final_scores, HOLES_REMAINING[last_hole])
+
+
+def play_out_matches(hole_signs):
+    """
+    Running match score over a (matches x 18) matrix of hole results.
+    Returns the final lead (from player 1's side) and the index of the hole
+    where each match ended, i.e. was closed out or reached the 18th.
+    """
+    match_scores = np.cumsum(hole_signs, axis=1, dtype=np.int8)
+    closed_out = np.abs(match_scores) > HOLES_REMAINING
+    last_hole = np.where(closed_out.any(axis=1), closed_out.argmax(axis=1), HOLES - 1)
+    final_scores = match_scores[np.arange(len(hole_signs)), last_hole]
+    return final_scores, last_hole
+
+
+def summarize_matchplay(final_scores, holes_remaining):
+    """Turn per-match final scores and holes left into the results dict."""
+    results = {
+        'P1 Wins': int(np.count_nonzero(final_scores > 0)),
+        'P2 Wins': int(np.count_nonzero(final_scores < 0)),
+        'Ties': int(np.count_nonzero(final_scores == 0)),
+    }
+
+    # Encode (lead, holes remaining) as one integer so a bincount does the tally
+    decided = final_scores != 0
+    codes = np.abs(final_scores[decided]).astype(np.int64) * HOLES + holes_remaining[decided]
+    tally = np.bincount(codes, minlength=1)
+    margins = Counter()
+    for code in np.flatnonzero(tally):
+        lead, remaining = divmod(int(code), HOLES)
+        margins[f"{lead}&{remaining + 1}"] = int(tally[code])
+    results['Margins'] = margins
+    results['Simulations'] = int(len(final_scores))
+    return results
+
+
+# --- Stroke Play ---
+def sample_round_totals(player, size, rng):
+    """Draw 18-hole gross totals from the player's score model."""
+    if player.get('model', 'normal') == 'empirical':
+        return rng.choice(np.asarray(player['scores'], dtype=float), size)
+    return rng.normal(player['avg'], player['std'], size)
+
+
+def simulate_strokeplay_batch(player1, player2, simulations=10000, rng=None):
+    """Monte Carlo stroke play duel. Works for any score model sample_round_totals knows."""
+    rng = rng if rng is not None else np.random.default_rng()
+    p1_total = sample_round_totals(player1, simulations, rng) - np.sum(player1['strokes'])
+    p2_total = sample_round_totals(player2, simulations, rng) - np.sum(player2['strokes'])
+    return {
+        'P1 Wins': int(np.count_nonzero(p1_total < p2_total)),
+        'P2 Wins': int(np.count_nonzero(p2_total < p1_total)),
+        'Ties': int(np.count_nonzero(p1_total == p2_total)),
+        'Simulations': int(simulations),
+    }
+
+
+def integer_score_pmf(mean, std, lo, hi):
+    """P(round(X) == k) for k in lo..hi with X ~ N(mean, std)."""
+    edges = np.arange(lo, hi + 2) - 0.5
+    cdf = ndtr((edges - mean) / std)
+    return np.diff(cdf)
+
+
+def strokeplay_probabilities(player1, player2, rounding="integer"):
+    """
+    Exact stroke play odds for two normal score models.
+
+    rounding=None treats the totals as continuous, so ties never happen.
+    rounding="integer" rounds each gross total to a whole stroke before the
+    handicap strokes come off, which is how a real card is kept, and the tie
+    probability comes from convolving the two score distributions.
+    Values are probabilities (they sum to 1).
+    """
+    p1_net_mean = player1['avg'] - np.sum(player1['strokes'])
+    p2_net_mean = player2['avg'] - np.sum(player2['strokes'])
+
+    if rounding is None:
+        diff_std = np.sqrt(player1['std'] ** 2 + player2['std'] ** 2)
+        p1_wins = float(ndtr((p2_net_mean - p1_net_mean) / diff_std))
+        return {'P1 Wins': p1_wins, 'P2 Wins': 1.0 - p1_wins, 'Ties': 0.0}
+    if rounding != "integer":
+        raise ValueError(f"Unknown rounding model: {rounding}")
+
+    # Gross scores on a whole-stroke grid wide enough to hold ~all of the mass
+    pmfs, offsets = [], []
+    for player in (player1, player2):
+        spread = int(np.ceil(8 * player['std'])) + 1
+        lo = int(np.floor(player['avg'])) - spread
+        pmfs.append(integer_score_pmf(player['avg'], player['std'], lo, lo + 2 * spread))
+        offsets.append(lo - int(round(np.sum(player['strokes']))))
+
+    # diff_pmf[i] = P(p1 net - p2 net == i + diff_lo)
+    diff_pmf = np.convolve(pmfs[0], pmfs[1][::-1])
+    diff_lo = offsets[0] - (offsets[1] + len(pmfs[1]) - 1)
+    diffs = np.arange(len(diff_pmf)) + diff_lo
+    total = diff_pmf.sum()
+    return {
+        'P1 Wins': float(diff_pmf[diffs < 0].sum() / total),
+        'P2 Wins': float(diff_pmf[diffs > 0].sum() / total),
+        'Ties': float(diff_pmf[diffs == 0].sum() / total),
+    }
+
+
+# --- Match Play (exact Markov chain) ---
+def matchplay_distribution(p_win, p_halve, p_lose):
+    """
+    Exact match play outcome distribution.
+
+    The match is a Markov chain over (hole, lead). p_win / p_halve / p_lose are
+    per-hole probabilities from player 1's side. Walks the 18 holes once,
+    absorbing a state as soon as the lead is bigger than the holes left.
+
+    Returns probabilities: 'P1 Wins', 'P2 Wins', 'Ties', 'Margins' keyed by
+    (signed lead, holes remaining) at the moment the match ended, and
+    'Hole Wins P1' / 'Hole Wins P2' = chance each hole is played and won.
+    """
+    p_win, p_halve, p_lose = (np.asarray(p, dtype=float) for p in (p_win, p_halve, p_lose))
+    leads = np.arange(-HOLES, HOLES + 1)
+    state = np.zeros(len(leads))
+    state[HOLES] = 1.0  # all square on the first tee
+
+    margins = {}
+    hole_wins_p1 = np.zeros(HOLES)
+    hole_wins_p2 = np.zeros(HOLES)
+    for h in range(HOLES):
+        alive = state.sum()
+        hole_wins_p1[h] = alive * p_win[h]
+        hole_wins_p2[h] = alive * p_lose[h]
+
+        nxt = p_halve[h] * state
+        nxt[1:] += p_win[h] * state[:-1]
+        nxt[:-1] += p_lose[h] * state[1:]
+
+        holes_remaining = HOLES - 1 - h
+        for idx in np.flatnonzero((np.abs(leads) > holes_remaining) & (nxt > 0)):
+            margins[(int(leads[idx]), holes_remaining)] = float(nxt[idx])
+        nxt[np.abs(leads) > holes_remaining] = 0.0
+        state = nxt
+
+    return {
+        'P1 Wins': sum(p for (lead, _), p in margins.items() if lead > 0),
+        'P2 Wins': sum(p for (lead, _), p in margins.items() if lead < 0),
+        'Ties': float(state[HOLES]),
+        'Margins': margins,
+        'Hole Wins P1': hole_wins_p1,
+        'Hole Wins P2': hole_wins_p2,
+    }
+
+
+def hole_probabilities_normal(player1, player2):
+    """Per-hole win/halve/lose for the golf_simulator normal model (halves can't happen)."""
+    hole_diff_mean = (player1['avg'] - player2['avg']) / HOLES \
+        - (np.asarray(player1['strokes']) - np.asarray(player2['strokes']))
+    hole_diff_std = np.sqrt((player1['std'] ** 2 + player2['std'] ** 2) / HOLES)
+    p_win = ndtr(-hole_diff_mean / hole_diff_std) * np.ones(HOLES)
+    return p_win, np.zeros(HOLES), 1.0 - p_win
+
+
+# --- handicap.py hole model ---
+def get_hole_std_dev(handicap_index):
+    return [0.6, 0.8, 1.0, 1.2, 1.4][min(int(handicap_index // 5), 4)]
+
+
+def allocate_strokes(h1, h2, hole_handicaps):
+    diff = int(round(h1 - h2))
+    strokes = [0] * 18
+    if diff > 0:
+        sorted_holes = sorted(range(18), key=lambda x: hole_handicaps[x])
+        for i in range(diff):
+            strokes[sorted_holes[i % 18]] += 1
+    return strokes
+
+
+@lru_cache(maxsize=None)
+def _hole_score_cdf(par, handicap_tenths):
+    handicap_index = handicap_tenths / 10
+    mean_score = par + (handicap_index / 18.0)
+    std_dev = get_hole_std_dev(handicap_index)
+    lower, upper = par - 1, par + 4
+    scores = np.arange(lower, upper + 1)
+    edges = np.clip(np.append(scores - 0.5, upper + 0.5), lower, upper)
+    cdf = ndtr((edges - mean_score) / std_dev)
+    cdf = (cdf[1:] - cdf[0]) / (cdf[-1] - cdf[0])
+    cdf.setflags(write=False)
+    return cdf
+
+
+def hole_score_pmf(par, handicap_index):
+    """
+    Distribution of round(X) for the handicap.py hole model, where X is a normal
+    around par + index / 18 truncated to [par - 1, par + 4].
+    Returns (scores, probabilities) for par - 1 .. par + 4.
+
+    The CDF is cached per (par, index to 0.1), which is the precision the
+    forecaster inputs use, so each one is only built once per process.
+    """
+    cdf = _hole_score_cdf(int(par), int(round(handicap_index * 10)))
+    return np.arange(par - 1, par + 5), np.diff(cdf, prepend=0.0)
+
+
+def sample_hole_scores(pars, handicap_index, size, rng=None):
+    """
+    Draw a (size x len(pars)) matrix of rounded hole scores by inverse-CDF lookup
+    into the cached hole distributions. Same model as hole_score_pmf.
+    """
+    rng = rng if rng is not None else np.random.default_rng()
+    tenths = int(round(handicap_index * 10))
+    cdfs = np.stack([_hole_score_cdf(int(par), tenths) for par in pars])
+    u = rng.random((size, len(pars)))
+    # Number of CDF steps below u is the offset from par - 1 (last step is 1.0)
+    offsets = (u[:, :, None] >= cdfs[None, :, :-1]).sum(axis=2)
+    return np.asarray(pars)[None, :] - 1 + offsets
+
+
+def simulate_match_play_batch(pars, hole_handicaps, hcp1, hcp2, simulations=1000, rng=None):
+    """
+    Play `simulations` handicap.py matches in one pass.
+
+    Returns compact arrays instead of per-hole dicts:
+    'Hole Results' (simulations x 18, int8 HOLE_* codes), 'Final Lead'
+    (player 1's lead when the match ended) and 'Holes Remaining' at that point.
+    """
+    rng = rng if rng is not None else np.random.default_rng()
+    strokes_p1 = np.asarray(allocate_strokes(hcp1, hcp2, hole_handicaps))
+    strokes_p2 = np.asarray(allocate_strokes(hcp2, hcp1, hole_handicaps))
+    p1_net = sample_hole_scores(pars, hcp1, simulations, rng) - strokes_p1
+    p2_net = sample_hole_scores(pars, hcp2, simulations, rng) - strokes_p2
+
+    hole_signs = np.sign(p2_net - p1_net).astype(np.int8)
+    final_scores, last_hole = play_out_matches(hole_signs)
+    played = np.arange(HOLES)[None, :] <= last_hole[:, None]
+    return {
+        'Hole Results': np.where(played, hole_signs, np.int8(HOLE_NOT_PLAYED)).astype(np.int8),
+        'Final Lead': final_scores,
+        'Holes Remaining': HOLES_REMAINING[last_hole].astype(np.int8),
+    }
+
+
+# Decided margins are tallied as (lead + HOLES) * HOLES + holes remaining
+MARGIN_CODES = (2 * HOLES + 1) * HOLES
+
+
+def margin_counts(final_lead, holes_remaining):
+    """Fixed-length tally of decided margins, so shard tallies can simply be added."""
+    decided = final_lead != 0
+    codes = (final_lead[decided].astype(np.int64) + HOLES) * HOLES + holes_remaining[decided]
+    return np.bincount(codes, minlength=MARGIN_CODES)
+
+
+def margin_shares(tally, simulations):
+    """{(lead, holes remaining): share} from a margin_counts tally."""
+    return {
+        (int(code) // HOLES - HOLES, int(code) % HOLES): tally[code] / simulations
+        for code in np.flatnonzero(tally)
+    }
+
+
+def margin_probabilities(final_lead, holes_remaining):
+    """{(lead, holes remaining): share} for decided matches, same keys as matchplay_distribution."""
+    return margin_shares(margin_counts(final_lead, holes_remaining), len(final_lead))
+
+
+def count_match_play_batch(pars, hole_handicaps, hcp1, hcp2, simulations=1000, rng=None):
+    """
+    simulate_match_play_batch reduced to counts: outcome totals, the
+    margin_counts tally and per-hole win counts. Shards merge with
+    merge_counts, so a long adaptive run never holds the raw holes.
+    """
+    batch = simulate_match_play_batch(pars, hole_handicaps, hcp1, hcp2, simulations, rng)
+    final_lead, holes = batch['Final Lead'], batch['Hole Results']
+    return {
+        'Simulations': simulations,
+        'P1 Wins': int((final_lead > 0).sum()),
+        'P2 Wins': int((final_lead < 0).sum()),
+        'Ties': int((final_lead == 0).sum()),
+        'Margins': margin_counts(final_lead, batch['Holes Remaining']),
+        'Hole Wins P1': (holes == HOLE_P1_WIN).sum(axis=0),
+        'Hole Wins P2': (holes == HOLE_P2_WIN).sum(axis=0),
+    }
+
+
+def hole_outcome_probabilities(pars, hcp1, hcp2, strokes_p1, strokes_p2):
+    """Per-hole win/halve/lose probabilities for player 1 under the handicap.py model."""
+    p_win, p_halve, p_lose = np.zeros(HOLES), np.zeros(HOLES), np.zeros(HOLES)
+    for i in range(HOLES):
+        scores, probs1 = hole_score_pmf(pars[i], hcp1)
+        _, probs2 = hole_score_pmf(pars[i], hcp2)
+        net_diff = (scores[:, None] - strokes_p1[i]) - (scores[None, :] - strokes_p2[i])
+        joint = probs1[:, None] * probs2[None, :]
+        p_win[i] = joint[net_diff < 0].sum()
+        p_halve[i] = joint[net_diff == 0].sum()
+        p_lose[i] = joint[net_diff > 0].sum()
+    return p_win, p_halve, p_lose
+
+
+# --- Parallel runner ---
+# Shards have a fixed size so the same seed always produces the same shards,
+# and therefore the same merged result, whatever the worker count.
+SHARD_SIZE = 50000
+SIM_WORKERS = int(os.environ.get("SIM_WORKERS", 0)) or os.cpu_count() or 1
+
+_pool = None
+_pool_lock = threading.Lock()
+
+
+def _get_pool():
+    # One long-lived pool of SIM_WORKERS processes for every caller; spawn
+    # rather than fork since Streamlit runs threads. A smaller workers
+    # argument below only decides whether to go parallel at all.
+    global _pool
+    with _pool_lock:
+        if _pool is None:
+            _pool = ProcessPoolExecutor(max_workers=SIM_WORKERS, mp_context=mp.get_context("spawn"))
+        return _pool
+
+
+def _run_shard(task):
+    simulate, size, seed_seq, kwargs = task
+    return simulate(simulations=size, rng=np.random.default_rng(seed_seq), **kwargs)
+
+
+def merge_counts(parts):
+    """Merge shard results by adding numbers, Counters and count arrays key by key."""
+    merged = parts[0]
+    for part in parts[1:]:
+        merged = {key: merged[key] + part[key] for key in merged}
+    return merged
+
+
+def run_sharded(simulate, simulations, seed=None, workers=None, merge=merge_counts,
+                shard_size=SHARD_SIZE, **kwargs):
+    """
+    Run simulate(simulations=n, rng=..., **kwargs) across a process pool.
+
+    The count is cut into shard_size pieces, each seeded from
+    SeedSequence(seed).spawn, and the shard results are merged in shard order.
+    simulate must be a module-level function so it can be sent to workers.
+    """
+    sizes = [shard_size] * (simulations // shard_size)
+    if simulations % shard_size:
+        sizes.append(simulations % shard_size)
+    tasks = [(simulate, size, child, kwargs)
+             for size, child in zip(sizes, np.random.SeedSequence(seed).spawn(len(sizes)))]
+
+    workers = min(workers or SIM_WORKERS, len(tasks))
+    if workers <= 1:
+        return merge([_run_shard(task) for task in tasks])
+    return merge(list(_get_pool().map(_run_shard, tasks)))
+
+
+def _call_with_kwargs(task):
+    func, kwargs = task
+    return func(**kwargs)
+
+
+def map_sharded(func, tasks, workers=None, merge=merge_counts):
+    """
+    Run func(**task) for each task dict across the same process pool and merge
+    the results in task order. For work that is split by explicit ranges
+    rather than by simulation count.
+    """
+    workers = min(workers or SIM_WORKERS, len(tasks))
+    if workers <= 1:
+        return merge([func(**task) for task in tasks])
+    return merge(list(_get_pool().map(_call_with_kwargs, [(func, task) for task in tasks])))
+
+
+# --- Adaptive simulation count ---
+ADAPTIVE_SHARD_SIZE = 5000
+
+
+def wilson_interval(successes, n, z=1.96):
+    """Wilson score interval for a binomial proportion."""
+    if n == 0:
+        return 0.0, 1.0
+    p = successes / n
+    denom = 1 + z ** 2 / n
+    centre = (p + z ** 2 / (2 * n)) / denom
+    half = z * np.sqrt(p * (1 - p) / n + z ** 2 / (4 * n ** 2)) / denom
+    return float(max(0.0, centre - half)), float(min(1.0, centre + half))
+
+
+def outcome_counter(*keys):
+    """outcome_counts function for count dicts like {'P1 Wins': .., 'Simulations': ..}."""
+    def count(result):
+        return {key: result[key] for key in keys}, result['Simulations']
+    return count
+
+
+def _round_shards(successes, total, tolerance, z, shard_size, workers):
+    # Shards still needed for the widest interval to reach tolerance, judged
+    # from the most uncertain outcome so far (p = 0.5 before any data)
+    p = min((count / total for count in successes.values()), key=lambda q: abs(q - 0.5)) if total else 0.5
+    needed = z ** 2 * p * (1 - p) / tolerance ** 2 - total
+    return int(min(workers, max(1, np.ceil(needed / shard_size))))
+
+
+def run_adaptive(simulate, outcome_counts, tolerance=0.005, max_simulations=1000000, time_budget=None,
+                 seed=None, workers=None, merge=merge_counts, shard_size=ADAPTIVE_SHARD_SIZE, z=1.96, **kwargs):
+    """
+    Keep simulating in shards until the Wilson interval on every outcome is
+    narrower than +/- tolerance, max_simulations is reached or time_budget
+    (seconds) runs out.
+
+    outcome_counts(result) -> ({outcome: successes}, n). Each round submits
+    only as many shards (up to workers) as the tolerance still calls for, and
+    every stopping rule is checked as each shard is merged, in seed order, so
+    for a given seed the stopping point doesn't depend on the worker count
+    (only the time budget can change it). merge should add counts (the
+    default) rather than stack raw samples. The result gets 'Intervals'
+    {outcome: (low, high)} and 'Converged'.
+    """
+    seed_seq = np.random.SeedSequence(seed)
+    workers = workers or SIM_WORKERS
+    started = time.monotonic()
+    merged, successes, intervals, converged, total = None, {}, {}, False, 0
+
+    while True:
+        sizes = []
+        for _ in range(_round_shards(successes, total, tolerance, z, shard_size, workers)):
+            size = min(shard_size, max_simulations - total - sum(sizes))
+            if size > 0:
+                sizes.append(size)
+        tasks = [(simulate, size, child, kwargs) for size, child in zip(sizes, seed_seq.spawn(len(sizes)))]
+        if len(tasks) <= 1:
+            futures = None
+            parts = (_run_shard(task) for task in tasks)
+        else:
+            futures = [_get_pool().submit(_run_shard, task) for task in tasks]
+            parts = (future.result() for future in futures)
+
+        for part in parts:
+            merged = part if merged is None else merge([merged, part])
+            successes, total = outcome_counts(merged)
+            intervals = {key: wilson_interval(count, total, z) for key, count in successes.items()}
+            converged = all((high - low) / 2 <= tolerance for low, high in intervals.values())
+            out_of_time = time_budget is not None and time.monotonic() - started >= time_budget
+            if converged or total >= max_simulations or out_of_time:
+                for future in futures or ():
+                    future.cancel()
+                merged['Intervals'] = intervals
+                merged['Converged'] = converged
+                return merged
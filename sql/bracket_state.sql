@@ -0,0 +1,8 @@
+-- Compact bracket state (bracket_state.BracketState.to_compact):
+--   {"s": [16 player names by seed], "w": "<15 chars, slot winner seed in hex or '-'>"}
+-- bracket_progression rows carry it from finalization; final_results rows
+-- carry the completed bracket. The per-round JSON columns are still written
+-- for older readers, and rows without state fall back to them.
+
+alter table bracket_progression add column if not exists state text;
+alter table final_results add column if not exists state text;
@@ -0,0 +1,32 @@
+-- Server-assigned change stamp for the change feed (data_helpers.ChangeFeed)
+-- and the offline sync pull (offline_helpers.SyncWorker). Client clocks and
+-- offline replays can't be trusted to move created_at/updated_at forward, so
+-- every insert and update gets the database clock here.
+-- Apply before deploying the feed; until then the feed reports an error and
+-- the table cache falls back to its TTLs.
+
+create or replace function set_synced_at() returns trigger as $$
+begin
+    new.synced_at := clock_timestamp();
+    return new;
+end;
+$$ language plpgsql;
+
+alter table tournament_matches
+    add column if not exists synced_at timestamptz not null default clock_timestamp();
+create index if not exists tournament_matches_synced_at_idx on tournament_matches (synced_at);
+
+-- Named to fire after tournament_matches_lww (triggers run in name order)
+drop trigger if exists tournament_matches_synced_at on tournament_matches;
+create trigger tournament_matches_synced_at
+    before insert or update on tournament_matches
+    for each row execute function set_synced_at();
+
+alter table bracket_progression
+    add column if not exists synced_at timestamptz not null default clock_timestamp();
+create index if not exists bracket_progression_synced_at_idx on bracket_progression (synced_at);
+
+drop trigger if exists bracket_progression_synced_at on bracket_progression;
+create trigger bracket_progression_synced_at
+    before insert or update on bracket_progression
+    for each row execute function set_synced_at();
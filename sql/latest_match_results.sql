@@ -0,0 +1,13 @@
+-- latest_match_results: newest group-stage result for each (pod, player1, player2).
+-- Read by data_helpers._fetch_latest_match_results; the app falls back to
+-- deduplicating tournament_matches locally if this view is missing.
+
+create or replace view latest_match_results as
+select distinct on (pod, player1, player2)
+    pod, player1, player2, winner, margin, created_at
+from tournament_matches
+where pod is not null
+order by pod, player1, player2, created_at desc;
+
+create index if not exists tournament_matches_pair_created_idx
+    on tournament_matches (pod, player1, player2, created_at desc);
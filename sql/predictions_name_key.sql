@@ -0,0 +1,10 @@
+-- One prediction per person. name_key mirrors data_helpers.normalize_name
+-- (trim, lowercase, non-breaking space -> space, curly apostrophe -> ').
+-- Check for existing duplicates before adding the unique index:
+--   select name_key, count(*) from predictions group by 1 having count(*) > 1;
+
+alter table predictions
+    add column if not exists name_key text
+    generated always as (lower(btrim(replace(replace(name, chr(160), ' '), '’', '''')))) stored;
+
+create unique index if not exists predictions_name_key_idx on predictions (name_key);
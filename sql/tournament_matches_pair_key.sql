@@ -0,0 +1,14 @@
+-- One group-stage row per pairing, so save_match_result can upsert on
+-- (pod, player1, player2). Bracket rows have a null pod and are unaffected.
+-- Remove older duplicates first, keeping the newest row for each pairing.
+
+delete from tournament_matches t
+using tournament_matches newer
+where t.pod is not null
+  and t.pod = newer.pod
+  and t.player1 = newer.player1
+  and t.player2 = newer.player2
+  and (t.created_at, t.id) < (newer.created_at, newer.id);
+
+alter table tournament_matches
+    add constraint tournament_matches_pair_key unique (pod, player1, player2);
@@ -0,0 +1,27 @@
+-- Per-row version stamps for the offline-first sync (offline_helpers.py).
+-- Clients stamp every write with epoch seconds; the trigger keeps whichever
+-- write has the higher stamp, so a late-arriving offline edit can't clobber
+-- a newer one (last-writer-wins).
+
+alter table tournament_matches
+    add column if not exists version double precision not null default extract(epoch from now());
+
+create index if not exists tournament_matches_version_idx on tournament_matches (version);
+
+create or replace function tournament_matches_keep_newest() returns trigger as $$
+begin
+    if new.version < old.version then
+        return old;
+    end if;
+    -- Writers that don't stamp (the online app) still move the version forward
+    if new.version = old.version then
+        new.version := extract(epoch from clock_timestamp());
+    end if;
+    return new;
+end;
+$$ language plpgsql;
+
+drop trigger if exists tournament_matches_lww on tournament_matches;
+create trigger tournament_matches_lww
+    before update on tournament_matches
+    for each row execute function tournament_matches_keep_newest();
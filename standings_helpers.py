@@ -0,0 +1,122 @@
+# standings_helpers.py
+# Group stage standings from match results.
+# Result keys ("pod|p1 vs p2") are parsed once into (pod, p1, p2) and each
+# result's contribution is kept, so changing one result only touches the two
+# players in it instead of rescanning every result for every player.
+
+from collections import defaultdict
+
+import pandas as pd
+
+MARGIN_LOOKUP = {
+    "1 up": 1, "2 and 1": 3, "3 and 2": 5, "4 and 3": 7,
+    "5 and 4": 9, "6 and 5": 11, "7 and 6": 13, "8 and 7": 15, "9 and 8": 17
+}
+
+
+def parse_match_key(key):
+    """'pod|p1 vs p2' -> (pod, p1, p2), or None if the key isn't a group match."""
+    pod, sep, pair = key.partition("|")
+    if not sep:
+        return None
+    player1, sep, player2 = pair.partition(" vs ")
+    if not sep:
+        return None
+    return pod, player1.strip(), player2.strip()
+
+
+def margin_value(margin):
+    """Numeric margin; accepts stored numbers or labels like '3 and 2'."""
+    if isinstance(margin, str):
+        return MARGIN_LOOKUP.get(margin, 0)
+    return margin or 0
+
+
+class StandingsEngine:
+    """
+    Points and margin per (pod, player), updated one result at a time.
+    A win is 1 point plus the margin, a tie half a point each, a loss minus the margin.
+    """
+
+    def __init__(self, pods, match_results=None):
+        self.pods = {pod: list(players) for pod, players in pods.items()}
+        self.totals = defaultdict(lambda: [0, 0])  # (pod, name) -> [points, margin]
+        self.results = {}                          # (pod, p1, p2) -> (winner, margin)
+        self.by_player = defaultdict(set)          # (pod, name) -> {(pod, p1, p2)}
+        if match_results:
+            self.update(match_results)
+
+    def _apply(self, match, winner, margin, sign):
+        pod, player1, player2 = match
+        if winner == "Tie":
+            for name in (player1, player2):
+                self.totals[(pod, name)][0] += 0.5 * sign
+        elif winner in (player1, player2):
+            loser = player2 if winner == player1 else player1
+            self.totals[(pod, winner)][0] += sign
+            self.totals[(pod, winner)][1] += margin * sign
+            self.totals[(pod, loser)][1] -= margin * sign
+
+    def set_result(self, match, winner, margin):
+        """Record or replace one result; match is a key string or a (pod, p1, p2) tuple."""
+        if isinstance(match, str):
+            match = parse_match_key(match)
+            if match is None:
+                return
+        new = (winner, margin_value(margin))
+        old = self.results.get(match)
+        if old == new:
+            return
+        if old is not None:
+            self._apply(match, *old, sign=-1)
+        self._apply(match, *new, sign=1)
+        self.results[match] = new
+        pod, player1, player2 = match
+        self.by_player[(pod, player1)].add(match)
+        self.by_player[(pod, player2)].add(match)
+
+    def remove_result(self, match):
+        if isinstance(match, str):
+            match = parse_match_key(match)
+        old = self.results.pop(match, None)
+        if old is not None:
+            self._apply(match, *old, sign=-1)
+            pod, player1, player2 = match
+            self.by_player[(pod, player1)].discard(match)
+            self.by_player[(pod, player2)].discard(match)
+
+    def update(self, match_results):
+        """Sync to a full {key: {"winner", "margin"}} dict, applying only what changed."""
+        seen = set()
+        for key, result in match_results.items():
+            match = parse_match_key(key)
+            if match is None:
+                continue
+            seen.add(match)
+            self.set_result(match, result.get("winner"), result.get("margin", 0))
+        for match in set(self.results) - seen:
+            self.remove_result(match)
+
+    def player_matches(self, pod, name):
+        return sorted(self.by_player.get((pod, name), ()))
+
+    def standings(self, pod):
+        """One pod as a DataFrame with name, handicap, points, margin (pod order)."""
+        records = []
+        for player in self.pods.get(pod, []):
+            points, margin = self.totals.get((pod, player["name"]), (0, 0))
+            records.append({
+                "name": player["name"],
+                "handicap": player["handicap"],
+                "points": points,
+                "margin": margin
+            })
+        return pd.DataFrame(records)
+
+    def pod_scores(self):
+        return {pod: self.standings(pod) for pod in self.pods}
+
+
+def compute_pod_standings_from_results(pods, match_results):
+    """{pod: DataFrame(name, handicap, points, margin)} for a full set of results."""
+    return StandingsEngine(pods, match_results).pod_scores()
@@ -0,0 +1,118 @@
+# Checks the head-to-head odds table and the tournament Monte Carlo against
+# exact references.
+
+import numpy as np
+import pytest
+
+from odds_helpers import (
+    FINAL_MATCH_ID, R16_MATCH_IDS, OddsTable, compute_odds_matrix, simulate_tournament, tournament_counts
+)
+from sim_helpers import COURSES, simulate_match_play_batch
+from tournament_data import pods
+
+
+def assert_share(exact, successes, n, sigmas=5):
+    se = np.sqrt(max(exact * (1 - exact), 1 / n) / n)
+    assert abs(successes / n - exact) <= sigmas * se, (successes / n, exact)
+
+
+def synthetic_odds(names, seed):
+    """Odds for any pairing from random strengths; halves are a flat 10%."""
+    strength = np.random.default_rng(seed).uniform(1, 4, len(names))
+    win = (0.9 * strength[:, None] / (strength[:, None] + strength[None, :])).astype(np.float32)
+    halve = np.full(win.shape, 0.1, dtype=np.float32)
+    np.fill_diagonal(win, np.nan)
+    np.fill_diagonal(halve, np.nan)
+    margin_pmf = np.zeros((len(names), len(names), 19), dtype=np.float32)
+    margin_pmf[:, :, 2] = np.nan_to_num(win)
+    return OddsTable(names, win, halve, margin_pmf)
+
+
+def knockout_reach(r16_pairs, odds):
+    """Exact chance each player wins each knockout round, walking the bracket level by level."""
+    knockout_win = np.nan_to_num(odds.win) + np.nan_to_num(odds.halve) / 2
+    # One {player: chance of winning the slot} dict per slot, starting with the R16 matches
+    level = []
+    for a, b in r16_pairs:
+        i, j = odds.index[a], odds.index[b]
+        level.append({i: knockout_win[i, j], j: knockout_win[j, i]})
+    rounds = [level]
+    while len(level) > 1:
+        nxt = []
+        for left, right in zip(level[0::2], level[1::2]):
+            merged = {}
+            for i, p_i in left.items():
+                merged[i] = p_i * sum(p_j * knockout_win[i, j] for j, p_j in right.items())
+            for j, p_j in right.items():
+                merged[j] = p_j * sum(p_i * knockout_win[j, i] for i, p_i in left.items())
+            nxt.append(merged)
+        level = nxt
+        rounds.append(level)
+    return rounds
+
+
+@pytest.fixture(scope="module")
+def odds_table():
+    return compute_odds_matrix([p for players in pods.values() for p in players], "Cypress")
+
+
+def test_odds_matrix_is_consistent(odds_table):
+    known = ~np.isnan(odds_table.win)
+    total = odds_table.win + odds_table.win.T + odds_table.halve
+    assert np.allclose(total[known], 1.0, atol=1e-5)
+    # The margin distribution of each winner adds up to their win chance
+    assert np.allclose(odds_table.margin_pmf.sum(axis=2)[known], odds_table.win[known], atol=1e-5)
+
+
+def test_odds_matrix_agrees_with_simulation(odds_table):
+    players = [p for players in pods.values() for p in players if p["handicap"] is not None]
+    p1, p2 = players[0], players[-1]
+    course = COURSES["Cypress"]
+    n = 200000
+    batch = simulate_match_play_batch(course["pars"], course["handicaps"], p1["handicap"], p2["handicap"], n,
+                                      rng=np.random.default_rng(11))
+    odds = odds_table.lookup(p1["name"], p2["name"])
+    assert_share(odds["win"], np.count_nonzero(batch["Final Lead"] > 0), n)
+    assert_share(odds["halve"], np.count_nonzero(batch["Final Lead"] == 0), n)
+
+
+def test_knockout_simulation_agrees_with_exact_bracket():
+    names = [p["name"] for players in pods.values() for p in players][:16]
+    odds = synthetic_odds(names, seed=12)
+    r16_pairs = list(zip(names[0::2], names[1::2]))
+    n = 200000
+    counts = tournament_counts(pods, {}, odds, n, r16_pairs=r16_pairs, rng=np.random.default_rng(13))
+    rounds = knockout_reach(r16_pairs, odds)
+    for column, level in zip(["Quarterfinal", "Semifinal", "Final", "Champion"], rounds):
+        for group in level:
+            for i, p in group.items():
+                assert_share(p, counts[column][i], n)
+
+
+def test_decided_matches_pin_the_simulation():
+    names = [p["name"] for players in pods.values() for p in players][:16]
+    odds = synthetic_odds(names, seed=14)
+    r16_pairs = list(zip(names[0::2], names[1::2]))
+    winners = {match_id: pair[1] for match_id, pair in zip(R16_MATCH_IDS, r16_pairs)}
+    winners[FINAL_MATCH_ID] = names[1]
+    df = simulate_tournament(pods, {}, odds, 2000, r16_pairs=r16_pairs, bracket_winners=winners,
+                             seed=15, workers=1)
+    by_player = df.set_index("Player")
+    assert by_player.loc[names[1], "Champion"] == 1.0
+    assert by_player.loc[names[0], "Quarterfinal"] == 0.0
+    assert by_player["Quarterfinal"].sum() == pytest.approx(8.0)
+
+
+def test_group_stage_results_fix_pod_winners():
+    names = [p["name"] for players in pods.values() for p in players]
+    odds = synthetic_odds(names, seed=16)
+    # The first player of every pod beats the rest, 3&2
+    results = {
+        f"{pod_name}|{players[0]['name']} vs {other['name']}": {"winner": players[0]["name"], "margin": 5}
+        for pod_name, players in pods.items() for other in players[1:]
+    }
+    counts = tournament_counts(pods, results, odds, 5000, rng=np.random.default_rng(17))
+    for players in pods.values():
+        assert counts["Win Pod"][odds.index[players[0]["name"]]] == 5000
+        assert counts["Make Bracket"][odds.index[players[0]["name"]]] == 5000
+    assert counts["Make Bracket"].sum() == 16 * 5000
@@ -0,0 +1,113 @@
+# Drives the offline-first sync against MemoryBackend, the in-process stand-in for Supabase.
+
+import pytest
+
+import offline_helpers
+from offline_helpers import LocalStore, MemoryBackend, SyncWorker
+
+
+def result(pod, player1, player2, winner, margin=1):
+    return {"pod": pod, "player1": player1, "player2": player2, "winner": winner, "margin": margin}
+
+
+@pytest.fixture
+def backend():
+    return MemoryBackend()
+
+
+@pytest.fixture
+def device(tmp_path, backend):
+    """A store plus its sync worker on the shared backend; call with a name per device."""
+    def make(name):
+        store = LocalStore(str(tmp_path / f"{name}.sqlite"))
+        return store, SyncWorker(store, backend)
+    return make
+
+
+@pytest.fixture
+def clock(monkeypatch):
+    """Deterministic edit-time version stamps: clock.now = seconds."""
+    class Clock:
+        now = 1000.0
+    monkeypatch.setattr(offline_helpers, "new_version", lambda: Clock.now)
+    return Clock
+
+
+def winners(rows):
+    return {(row["pod"], row["player1"], row["player2"]): row["winner"] for row in rows}
+
+
+def test_offline_writes_queue_locally(device, backend):
+    store, worker = device("a")
+    backend.online = False
+
+    store.write("tournament_matches", result("A", "x", "y", "x"))
+    with pytest.raises(ConnectionError):
+        worker.sync_once()
+
+    assert store.pending_count() == 1
+    assert winners(store.read("tournament_matches")) == {("A", "x", "y"): "x"}
+    assert backend.tables["tournament_matches"] == {}
+
+
+def test_replay_reaches_other_devices(device, backend, clock):
+    store_a, worker_a = device("a")
+    store_b, worker_b = device("b")
+
+    backend.online = False
+    clock.now = 1000.0
+    store_a.write("tournament_matches", result("A", "x", "y", "x"))
+
+    # Meanwhile b keeps syncing a newer write of its own, moving its pull mark on
+    backend.online = True
+    clock.now = 2000.0
+    store_b.write("tournament_matches", result("B", "p", "q", "q"))
+    worker_b.sync_once()
+    worker_b.sync_once()
+
+    worker_a.sync_once()
+    assert store_a.pending_count() == 0
+    pushed = backend.tables["tournament_matches"]["pair:A|x vs y"]
+    assert pushed["synced_at"] > store_b.pulled_through("tournament_matches")
+
+    # a's replayed row has an older edit time than b's mark, but a newer server stamp
+    worker_b.sync_once()
+    assert winners(store_b.read("tournament_matches")) == {("A", "x", "y"): "x", ("B", "p", "q"): "q"}
+
+
+def test_newer_edit_wins_whatever_the_push_order(device, backend, clock):
+    store_a, worker_a = device("a")
+    store_b, worker_b = device("b")
+    backend.online = False
+
+    clock.now = 1000.0
+    store_a.write("tournament_matches", result("A", "x", "y", "x"))
+    clock.now = 2000.0
+    store_b.write("tournament_matches", result("A", "x", "y", "y"))
+
+    # The newer edit reaches the server first; the older one arrives late
+    backend.online = True
+    worker_b.sync_once()
+    worker_a.sync_once()
+    worker_b.sync_once()
+
+    assert backend.tables["tournament_matches"]["pair:A|x vs y"]["winner"] == "y"
+    for store in (store_a, store_b):
+        assert winners(store.read("tournament_matches")) == {("A", "x", "y"): "y"}
+        assert store.pending_count() == 0
+
+
+def test_local_edit_newer_than_server_is_kept(device, backend, clock):
+    store_a, worker_a = device("a")
+    store_b, worker_b = device("b")
+
+    clock.now = 1000.0
+    store_b.write("tournament_matches", result("A", "x", "y", "x"))
+    worker_b.sync_once()
+
+    clock.now = 2000.0
+    store_a.write("tournament_matches", result("A", "x", "y", "y"))
+    worker_a.sync_once()  # pulls b's older row first; it must not replace the pending edit
+
+    assert winners(store_a.read("tournament_matches")) == {("A", "x", "y"): "y"}
+    assert backend.tables["tournament_matches"]["pair:A|x vs y"]["winner"] == "y"
@@ -0,0 +1,135 @@
+# Checks the pick-matrix scorer and the exhaustive pool odds against a
+# brute-force walk over every remaining bracket.
+
+import itertools
+
+import numpy as np
+import pytest
+
+from bracket_state import NUM_SLOTS, feeder_slots
+from prediction_helpers import ROUND_FIELDS, ROUND_SLICES, SLOT_WEIGHTS, PredictionScorer, pool_odds, row_slots
+
+POSITIONS = [f"Player {chr(ord('A') + i)}" for i in range(16)]
+
+
+class StrengthOdds:
+    """Stand-in odds table: 90% of matches split by strength, 10% halved."""
+
+    def __init__(self, seed):
+        self.strength = dict(zip(POSITIONS, np.random.default_rng(seed).uniform(1, 4, 16)))
+
+    def lookup(self, player1, player2):
+        s1, s2 = self.strength[player1], self.strength[player2]
+        return {"win": 0.9 * s1 / (s1 + s2), "halve": 0.1, "loss": 0.9 * s2 / (s1 + s2)}
+
+    def beats(self, player1, player2):
+        return self.lookup(player1, player2)["win"] + 0.05
+
+
+def bracket(bits):
+    """Slot winners for an outcome given as 15 bits (0 = first feeder wins)."""
+    winners = []
+    for slot in range(NUM_SLOTS):
+        feeders = feeder_slots(slot)
+        pair = POSITIONS[2 * slot:2 * slot + 2] if feeders is None else [winners[f] for f in feeders]
+        winners.append(pair[bits[slot]])
+    return winners
+
+
+def losers(winners):
+    out = []
+    for slot in range(NUM_SLOTS):
+        feeders = feeder_slots(slot)
+        pair = POSITIONS[2 * slot:2 * slot + 2] if feeders is None else [winners[f] for f in feeders]
+        out.append(pair[1] if pair[0] == winners[slot] else pair[0])
+    return out
+
+
+def as_row(row_id, slots):
+    row, start = {"id": row_id, "name": f"Entry {row_id}", "timestamp": f"2025-06-01T10:00:{row_id:02d}"}, 0
+    for field, size in ROUND_FIELDS:
+        row[field] = slots[start] if field == "champion" else slots[start:start + size]
+        start += size
+    return row
+
+
+def score(picks, winners, slots=range(NUM_SLOTS)):
+    return sum(int(SLOT_WEIGHTS[s]) for s in slots if winners[s] and picks[s] == winners[s])
+
+
+@pytest.fixture
+def entries():
+    """Six full brackets plus two entries with scattered picks (some impossible, some blank)."""
+    rng = np.random.default_rng(21)
+    slots = [bracket(rng.integers(0, 2, NUM_SLOTS).tolist()) for _ in range(6)]
+    for _ in range(2):
+        slots.append([None if rng.random() < 0.2 else POSITIONS[k] for k in rng.integers(0, 16, NUM_SLOTS)])
+    return [as_row(i + 1, picks) for i, picks in enumerate(slots)]
+
+
+def decided_slots(truth, count):
+    """The first `count` slots of a true bracket decided, the rest open."""
+    return [name if slot < count else None for slot, name in enumerate(truth)]
+
+
+def consistent_outcomes(decided):
+    for bits in itertools.product((0, 1), repeat=NUM_SLOTS):
+        winners = bracket(bits)
+        if all(d is None or d == w for d, w in zip(decided, winners)):
+            yield winners
+
+
+def test_totals_and_round_scores_match_loop(entries):
+    truth = bracket([1, 0] * 7 + [1])
+    actual = decided_slots(truth, 12)
+    scorer = PredictionScorer(entries)
+    scorer.set_actual(actual)
+    slots = [row_slots(row) for row in entries]
+    assert scorer.totals().tolist() == [score(picks, actual) for picks in slots]
+    qf = range(NUM_SLOTS)[ROUND_SLICES["QF"]]
+    assert scorer.round_scores()["QF"].tolist() == [score(picks, actual, qf) for picks in slots]
+
+    # Deciding one more slot only rescores that column
+    changed = scorer.set_actual(decided_slots(truth, 13))
+    assert changed.tolist() == [12]
+    assert scorer.totals().tolist() == [score(picks, decided_slots(truth, 13)) for picks in slots]
+
+
+@pytest.mark.parametrize("decided", [0, 6, 11])
+def test_max_possible_matches_best_remaining_bracket(entries, decided):
+    truth = bracket([0, 1, 1] * 5)
+    actual = decided_slots(truth, decided)
+    full_brackets = entries[:6]
+    scorer = PredictionScorer(full_brackets)
+    scorer.set_actual(actual)
+    outcomes = list(consistent_outcomes(actual))
+    slots = [row_slots(row) for row in full_brackets]
+    best = [max(score(picks, winners) for winners in outcomes) for picks in slots]
+    assert scorer.max_possible(POSITIONS).tolist() == best
+
+
+@pytest.mark.parametrize("decided", [4, 9])
+def test_pool_odds_match_brute_force(entries, decided):
+    odds = StrengthOdds(seed=22)
+    truth = bracket([1, 1, 0] * 5)
+    actual = decided_slots(truth, decided)
+    scorer = PredictionScorer(entries)
+    scorer.set_actual(actual)
+
+    slots = [row_slots(row) for row in entries]
+    win, top3, expected, total = np.zeros(len(entries)), np.zeros(len(entries)), np.zeros(len(entries)), 0.0
+    for winners in consistent_outcomes(actual):
+        prob = np.prod([odds.beats(w, l) for slot, (w, l) in enumerate(zip(winners, losers(winners)))
+                        if actual[slot] is None])
+        scores = np.array([score(picks, winners) for picks in slots])
+        leaders = scores == scores.max()
+        win += prob * leaders / leaders.sum()
+        top3 += prob * (scores >= np.sort(scores)[::-1][2])
+        expected += prob * scores
+        total += prob
+
+    df = pool_odds(scorer, POSITIONS, actual, odds, workers=1, block_size=256).set_index("Name")
+    names = [row["name"] for row in entries]
+    assert df.loc[names, "Win %"].to_numpy() == pytest.approx(win / total, abs=1e-6)
+    assert df.loc[names, "Top 3 %"].to_numpy() == pytest.approx(top3 / total, abs=1e-6)
+    assert df.loc[names, "Expected Score"].to_numpy() == pytest.approx(expected / total, abs=1e-4)
@@ -0,0 +1,143 @@
+# Checks the vectorized and exact engines in sim_helpers against plain loops
+# and seeded Monte Carlo runs of the same model.
+
+import numpy as np
+import pytest
+
+from sim_helpers import (
+    COURSES, HOLES, allocate_strokes, count_match_play_batch, hole_outcome_probabilities,
+    hole_probabilities_normal, hole_score_pmf, margin_probabilities, matchplay_distribution,
+    outcome_counter, play_out_matches, run_adaptive, run_sharded, sample_hole_scores,
+    simulate_match_play_batch, simulate_matchplay_batch, simulate_strokeplay_batch,
+    strokeplay_probabilities
+)
+
+COURSE = COURSES["Cypress"]
+
+
+def assert_share(exact, successes, n, sigmas=5):
+    """A Monte Carlo share agrees with the exact probability to within `sigmas` standard errors."""
+    se = np.sqrt(max(exact * (1 - exact), 1 / n) / n)
+    assert abs(successes / n - exact) <= sigmas * se, (successes / n, exact)
+
+
+def player(avg, std, strokes=0):
+    return {"avg": avg, "std": std, "strokes": np.array([1] * strokes + [0] * (HOLES - strokes))}
+
+
+def play_out_loop(signs):
+    """The original hole-by-hole match loop: stop once the lead beats the holes left."""
+    lead = 0
+    for hole, sign in enumerate(signs):
+        lead += sign
+        if abs(lead) > HOLES - 1 - hole:
+            return lead, hole
+    return lead, HOLES - 1
+
+
+def test_play_out_matches_matches_loop():
+    rng = np.random.default_rng(1)
+    hole_signs = rng.choice(np.array([-1, 0, 1], dtype=np.int8), size=(3000, HOLES), p=[0.4, 0.2, 0.4])
+    final_scores, last_hole = play_out_matches(hole_signs)
+    expected = [play_out_loop(row) for row in hole_signs.tolist()]
+    assert final_scores.tolist() == [lead for lead, _ in expected]
+    assert last_hole.tolist() == [hole for _, hole in expected]
+
+
+def test_matchplay_distribution_is_a_distribution():
+    p_win, p_halve, p_lose = hole_outcome_probabilities(
+        COURSE["pars"], 6.0, 15.0,
+        allocate_strokes(6.0, 15.0, COURSE["handicaps"]), allocate_strokes(15.0, 6.0, COURSE["handicaps"])
+    )
+    dist = matchplay_distribution(p_win, p_halve, p_lose)
+    assert dist["P1 Wins"] + dist["P2 Wins"] + dist["Ties"] == pytest.approx(1.0)
+    assert sum(dist["Margins"].values()) + dist["Ties"] == pytest.approx(1.0)
+    # Every hole is played with certainty until one side can close out on the 10th
+    assert dist["Hole Wins P1"][:10] == pytest.approx(p_win[:10])
+
+
+def test_normal_model_batch_agrees_with_exact():
+    p1, p2 = player(84, 4, strokes=5), player(80, 3)
+    exact = matchplay_distribution(*hole_probabilities_normal(p1, p2))
+    n = 200000
+    batch = simulate_matchplay_batch(p1, p2, n, rng=np.random.default_rng(2))
+    for key in ("P1 Wins", "P2 Wins", "Ties"):
+        assert_share(exact[key], batch[key], n)
+    # Batch margins are keyed "3&2" style, without the side
+    for margin, count in batch["Margins"].most_common(5):
+        lead, holes = map(int, margin.split("&"))
+        share = sum(p for (l, r), p in exact["Margins"].items() if abs(l) == lead and r == holes - 1)
+        assert_share(share, count, n)
+
+
+def test_handicap_model_batch_agrees_with_exact():
+    hcp1, hcp2 = 4.2, 12.8
+    strokes_p1 = allocate_strokes(hcp1, hcp2, COURSE["handicaps"])
+    strokes_p2 = allocate_strokes(hcp2, hcp1, COURSE["handicaps"])
+    exact = matchplay_distribution(*hole_outcome_probabilities(COURSE["pars"], hcp1, hcp2, strokes_p1, strokes_p2))
+
+    n = 200000
+    batch = simulate_match_play_batch(COURSE["pars"], COURSE["handicaps"], hcp1, hcp2, n,
+                                      rng=np.random.default_rng(3))
+    assert_share(exact["Ties"], np.count_nonzero(batch["Final Lead"] == 0), n)
+    assert_share(exact["P1 Wins"], np.count_nonzero(batch["Final Lead"] > 0), n)
+    for hole in range(HOLES):
+        assert_share(exact["Hole Wins P1"][hole], np.count_nonzero(batch["Hole Results"][:, hole] == 1), n)
+        assert_share(exact["Hole Wins P2"][hole], np.count_nonzero(batch["Hole Results"][:, hole] == -1), n)
+    simulated = margin_probabilities(batch["Final Lead"], batch["Holes Remaining"])
+    for key, share in exact["Margins"].items():
+        assert_share(share, simulated.get(key, 0.0) * n, n)
+
+
+def test_count_batch_matches_raw_batch():
+    kwargs = {"pars": COURSE["pars"], "hole_handicaps": COURSE["handicaps"], "hcp1": 9.0, "hcp2": 3.5}
+    batch = simulate_match_play_batch(simulations=5000, rng=np.random.default_rng(4), **kwargs)
+    counts = count_match_play_batch(simulations=5000, rng=np.random.default_rng(4), **kwargs)
+    assert counts["Ties"] == np.count_nonzero(batch["Final Lead"] == 0)
+    assert counts["Hole Wins P2"].tolist() == (batch["Hole Results"] == -1).sum(axis=0).tolist()
+    assert counts["Margins"].sum() + counts["Ties"] == 5000
+
+
+def test_sampled_hole_scores_follow_pmf():
+    n = 100000
+    scores = sample_hole_scores(COURSE["pars"][:3], 17.3, n, np.random.default_rng(5))
+    for hole, par in enumerate(COURSE["pars"][:3]):
+        values, probs = hole_score_pmf(par, 17.3)
+        for value, prob in zip(values, probs):
+            assert_share(prob, np.count_nonzero(scores[:, hole] == value), n)
+
+
+@pytest.mark.parametrize("rounding", [None, "integer"])
+def test_strokeplay_probabilities_agree_with_simulation(rounding):
+    p1, p2 = player(88.4, 5.1, strokes=7), player(81.2, 3.6)
+    exact = strokeplay_probabilities(p1, p2, rounding)
+    assert sum(exact.values()) == pytest.approx(1.0)
+
+    n = 400000
+    rng = np.random.default_rng(6)
+    gross1, gross2 = rng.normal(p1["avg"], p1["std"], n), rng.normal(p2["avg"], p2["std"], n)
+    if rounding == "integer":
+        gross1, gross2 = np.round(gross1), np.round(gross2)
+    net1, net2 = gross1 - p1["strokes"].sum(), gross2 - p2["strokes"].sum()
+    assert_share(exact["P1 Wins"], np.count_nonzero(net1 < net2), n)
+    assert_share(exact["Ties"], np.count_nonzero(net1 == net2), n)
+
+    if rounding is None:
+        batch = simulate_strokeplay_batch(p1, p2, n, rng=np.random.default_rng(7))
+        assert_share(exact["P1 Wins"], batch["P1 Wins"], n)
+
+
+def test_sharded_runs_do_not_depend_on_worker_count():
+    kwargs = {"pars": COURSE["pars"], "hole_handicaps": COURSE["handicaps"], "hcp1": 11.0, "hcp2": 7.5}
+    serial = run_sharded(count_match_play_batch, 12000, seed=8, workers=1, shard_size=5000, **kwargs)
+    parallel = run_sharded(count_match_play_batch, 12000, seed=8, workers=2, shard_size=5000, **kwargs)
+    assert serial["P1 Wins"] == parallel["P1 Wins"]
+    assert serial["Margins"].tolist() == parallel["Margins"].tolist()
+
+    outcomes = outcome_counter("P1 Wins", "P2 Wins", "Ties")
+    serial = run_adaptive(count_match_play_batch, outcomes, 0.01, seed=9, workers=1, **kwargs)
+    parallel = run_adaptive(count_match_play_batch, outcomes, 0.01, seed=9, workers=3, **kwargs)
+    assert serial["Converged"] and parallel["Converged"]
+    assert serial["Simulations"] == parallel["Simulations"]
+    assert serial["Hole Wins P1"].tolist() == parallel["Hole Wins P1"].tolist()
+    assert all((high - low) / 2 <= 0.01 for low, high in serial["Intervals"].values())